@@ -1,39 +1,32 @@
-﻿import networkx as nx
+﻿import os
+import sys
+import networkx as nx
 import random
-import copy
+
+# the graph copy and the edge store are shared with the unweighted models
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, 'unweighted'))
+from null_model_core.clone import clone_graph
+from null_model_core.edge_store import EdgeStore
 """
 + : weight=1
 - : weight=2
 """
 
 
-def snd_pos_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def snd_pos_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 1 and G[x][y]['weight'] == 1:
 
@@ -44,6 +37,7 @@ def snd_pos_swap(G0, nswap=1, max_tries=100):
                 G.add_edge(v, y, weight=1)
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -55,33 +49,19 @@ def snd_pos_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def snd_neg_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def snd_neg_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 2 and G[x][y]['weight'] == 2:
 
@@ -92,6 +72,7 @@ def snd_neg_swap(G0, nswap=1, max_tries=100):
                 G.add_edge(v, y, weight=2)
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -103,33 +84,19 @@ def snd_neg_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def snd_sign_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def snd_sign_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (G.is_directed() and u in G[v]) or (G.is_directed() and x in G[y]):
             continue
@@ -148,33 +115,19 @@ def snd_sign_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def snd_full_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def snd_full_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]):
 
@@ -185,6 +138,7 @@ def snd_full_swap(G0, nswap=1, max_tries=100):
                 G.add_edge(v, y, weight=G[x][y]['weight'])
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -196,33 +150,19 @@ def snd_full_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def snd_swap(G0, nswap=1, max_tries=100, paradox='false'):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def snd_swap(G0, nswap=1, max_tries=100, paradox='false', inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (paradox.lower() == 'true' and (u in G[v])) or (paradox.lower() == 'true' and (x in G[y])):
             continue
@@ -243,42 +183,27 @@ def snd_swap(G0, nswap=1, max_tries=100, paradox='false'):
     return G
 
 
-def sn_pos_swap(G0, nswap=1, max_tries=100):
+def sn_pos_swap(G0, nswap=1, max_tries=100, inplace=False):
 
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())           # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)   # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 1 and G[x][y]['weight'] == 1:
-            if connected == 1:  # 判断是否需要保持联通特性，为1的话则需要保持该特性
-                if not nx.is_connected(G):  # 保证网络是全联通的:若网络不是全联通网络，则撤回交换边的操作
-                    G.add_edge(u, v)
-                    G.add_edge(x, y)
-                    G.remove_edge(u, y)
-                    G.remove_edge(x, v)
-                    continue
-                swapcount = swapcount + 1
             G.add_edge(u, x, weight=1)
             G.add_edge(v, y, weight=1)
             G.remove_edge(u, v)
             G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
             swapcount += 1
 
         if n >= max_tries:
@@ -291,39 +216,26 @@ def sn_pos_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sn_neg_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def sn_neg_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 2 and G[x][y]['weight'] == 2:
             G.add_edge(u, x, weight=2)
             G.add_edge(v, y, weight=2)
             G.remove_edge(u, v)
             G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
             swapcount += 1
 
         if n >= max_tries:
@@ -336,35 +248,23 @@ def sn_neg_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sn_sign_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def sn_sign_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-            G[u][v]['weight'], G[x][y]['weight'] = G[
-                x][y]['weight'], G[u][v]['weight']
-            if G[u][v]['weight'] != G[x][y]['weight']:
-                swapcount += 1
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
+        G[u][v]['weight'], G[x][y]['weight'] = G[
+            x][y]['weight'], G[u][v]['weight']
+        if G[u][v]['weight'] != G[x][y]['weight']:
+            swapcount += 1
 
         if n >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -376,37 +276,26 @@ def sn_sign_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sn_full_swap(G0, nswap=1, max_tries=100):
-    # Instead of choosing uniformly at random from a generated edge list,
-    # this algorithm chooses nonuniformly from the set of nodes with
-    # probability weighted by degree.
-    G = copy.deepcopy(G0)
+def sn_full_swap(G0, nswap=1, max_tries=100, inplace=False):
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())  # keys, degree
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore(G.edges(), directed=G.is_directed())
 
     while swapcount < nswap:
-        #        if random.random() < 0.5: continue # trick to avoid periodicities?
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-            if (x not in G[u]) and (y not in G[v]):
-                G.add_edge(u, x, weight=G[u][v]['weight'])
-                G.add_edge(v, y, weight=G[x][y]['weight'])
-                G.remove_edge(u, v)
-                G.remove_edge(x, y)
-                swapcount += 1
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
+        if (x not in G[u]) and (y not in G[v]):
+            G.add_edge(u, x, weight=G[u][v]['weight'])
+            G.add_edge(v, y, weight=G[x][y]['weight'])
+            G.remove_edge(u, v)
+            G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
+            swapcount += 1
 
         if n >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
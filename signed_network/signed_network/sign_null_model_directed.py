@@ -1,17 +1,23 @@
-﻿import networkx as nx
+﻿import os
+import sys
+import networkx as nx
 import random
-import copy
+
+# the graph copy helper is shared with the unweighted null models
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, 'unweighted'))
+from null_model_core.clone import clone_graph
 """
 + : weight=1
 - : weight=2
 """
 
 
-def sign_network_positive_swap(G0, nswap=1, max_tries=100):
+def sign_network_positive_swap(G0, nswap=1, max_tries=100, inplace=False):
     # Instead of choosing uniformly at random from a generated edge list,
     # this algorithm chooses nonuniformly from the set of nodes with
     # probability weighted by degree.
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     keys, degrees = zip(*G.degree().items())  # keys, degree
@@ -56,11 +62,11 @@ def sign_network_positive_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sign_network_negative_swap(G0, nswap=1, max_tries=100):
+def sign_network_negative_swap(G0, nswap=1, max_tries=100, inplace=False):
     # Instead of choosing uniformly at random from a generated edge list,
     # this algorithm chooses nonuniformly from the set of nodes with
     # probability weighted by degree.
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     keys, degrees = zip(*G.degree().items())  # keys, degree
@@ -105,11 +111,11 @@ def sign_network_negative_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sign_network_sign_swap(G0, nswap=1, max_tries=100):
+def sign_network_sign_swap(G0, nswap=1, max_tries=100, inplace=False):
     # Instead of choosing uniformly at random from a generated edge list,
     # this algorithm chooses nonuniformly from the set of nodes with
     # probability weighted by degree.
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     keys, degrees = zip(*G.degree().items())  # keys, degree
@@ -151,11 +157,11 @@ def sign_network_sign_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sign_network_full_swap(G0, nswap=1, max_tries=100):
+def sign_network_full_swap(G0, nswap=1, max_tries=100, inplace=False):
     # Instead of choosing uniformly at random from a generated edge list,
     # this algorithm chooses nonuniformly from the set of nodes with
     # probability weighted by degree.
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     keys, degrees = zip(*G.degree().items())  # keys, degree
@@ -200,11 +206,11 @@ def sign_network_full_swap(G0, nswap=1, max_tries=100):
     return G
 
 
-def sign_network_swap(G0, nswap=1, max_tries=100, paradox='false'):
+def sign_network_swap(G0, nswap=1, max_tries=100, paradox='false', inplace=False):
     # Instead of choosing uniformly at random from a generated edge list,
     # this algorithm chooses nonuniformly from the set of nodes with
     # probability weighted by degree.
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     keys, degrees = zip(*G.degree().items())  # keys, degree
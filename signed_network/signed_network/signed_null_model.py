@@ -1,6 +1,16 @@
-﻿import networkx as nx
+﻿import os
+import sys
+import networkx as nx
 import random
 import copy
+
+# the swap helpers are shared with the unweighted null models
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, 'unweighted'))
+from null_model_core.block_swap import block_swap
+from null_model_core.clone import clone_graph
+from null_model_core.csr_graph import accept_csr
+from null_model_core.edge_store import EdgeStore
 """
 + : weight=1
 - : weight=2
@@ -16,7 +26,8 @@ __all__ = ['snd_pos_swap',
            'sn_full_swap']
 
 
-def snd_pos_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def snd_pos_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -26,11 +37,14 @@ def snd_pos_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The out degree of each node remains unchanged after swap.
 
     See Also
@@ -38,29 +52,22 @@ def snd_pos_swap(G, n_swap=1, max_tries=100):
     sn_pos_swap
 
     """
+
+    if not inplace:
+        G = clone_graph(G)
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 1 and G[x][y]['weight'] == 1:
 
@@ -71,6 +78,7 @@ def snd_pos_swap(G, n_swap=1, max_tries=100):
                 G.add_edge(v, y, weight=1)
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -82,7 +90,8 @@ def snd_pos_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def snd_neg_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def snd_neg_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -92,11 +101,14 @@ def snd_neg_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The in degree of each node remains unchanged after swap.
 
     See Also
@@ -105,29 +117,22 @@ def snd_neg_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 2 and G[x][y]['weight'] == 2:
 
@@ -138,6 +143,7 @@ def snd_neg_swap(G, n_swap=1, max_tries=100):
                 G.add_edge(v, y, weight=2)
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -149,7 +155,8 @@ def snd_neg_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def snd_sign_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def snd_sign_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model
 
     Parameters
@@ -159,11 +166,14 @@ def snd_sign_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The topological structure of this network remains unchanged after scrambling.
 
     See Also
@@ -172,29 +182,22 @@ def snd_sign_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (G.is_directed() and u in G[v]) or (G.is_directed() and x in G[y]):
             continue
@@ -213,7 +216,9 @@ def snd_sign_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def snd_full_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def snd_full_swap(G, n_swap=1, max_tries=100, block_size=None,
+                  inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -223,11 +228,17 @@ def snd_full_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    block_size : int, optional
+        Draw the proposals block_size at a time with NumPy (see
+        block_swap). By default they are drawn one at a time.
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The degree of each node and topological structure of this network changed after swap.
 
     See Also
@@ -236,29 +247,26 @@ def snd_full_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
+    if block_size:
+        return block_swap(G, n_swap, max_tries, pattern='ux',
+                          block_size=block_size, reciprocal=True)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]):
 
@@ -269,6 +277,7 @@ def snd_full_swap(G, n_swap=1, max_tries=100):
                 G.add_edge(v, y, weight=G[x][y]['weight'])
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
                 swapcount += 1
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -280,7 +289,8 @@ def snd_full_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def snd_swap(G, n_swap=1, max_tries=100, paradox='false'):
+@accept_csr(native=lambda a: True)
+def snd_swap(G, n_swap=1, max_tries=100, paradox='false', inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -290,38 +300,34 @@ def snd_swap(G, n_swap=1, max_tries=100, paradox='false'):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The degree of each node remains unchanged after swap.
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (paradox.lower() == 'true' and (u in G[v])) or (paradox.lower() == 'true' and (x in G[y])):
             continue
@@ -342,7 +348,8 @@ def snd_swap(G, n_swap=1, max_tries=100, paradox='false'):
     return G
 
 
-def sn_pos_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def sn_pos_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -352,11 +359,14 @@ def sn_pos_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The degree of each node remains unchanged after swap.
 
     See Also
@@ -365,41 +375,29 @@ def sn_pos_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())         
-    cdf = nx.utils.cumulative_distribution(degrees)   # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 1 and G[x][y]['weight'] == 1:
-            if connected == 1:  # 判断是否需要保持联通特性，为1的话则需要保持该特性
-                if not nx.is_connected(G):  # 保证网络是全联通的:若网络不是全联通网络，则撤回交换边的操作
-                    G.add_edge(u, v)
-                    G.add_edge(x, y)
-                    G.remove_edge(u, y)
-                    G.remove_edge(x, v)
-                    continue
-                swapcount = swapcount + 1
             G.add_edge(u, x, weight=1)
             G.add_edge(v, y, weight=1)
             G.remove_edge(u, v)
             G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
             swapcount += 1
 
         if n_try >= max_tries:
@@ -412,7 +410,8 @@ def sn_pos_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def sn_neg_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def sn_neg_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -422,11 +421,14 @@ def sn_neg_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The degree of each node remains unchanged after swap.
 
     See Also
@@ -435,35 +437,29 @@ def sn_neg_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-        else:
-            continue
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
 
         if (x not in G[u]) and (y not in G[v]) and G[u][v]['weight'] == 2 and G[x][y]['weight'] == 2:
             G.add_edge(u, x, weight=2)
             G.add_edge(v, y, weight=2)
             G.remove_edge(u, v)
             G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
             swapcount += 1
 
         if n_try >= max_tries:
@@ -476,7 +472,8 @@ def sn_neg_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def sn_sign_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def sn_sign_swap(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model
 
     Parameters
@@ -486,11 +483,14 @@ def sn_sign_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The topological structure of this network remains unchanged after scrambling.
 
     See Also
@@ -499,31 +499,26 @@ def sn_sign_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-            G[u][v]['weight'], G[x][y]['weight'] = G[
-                x][y]['weight'], G[u][v]['weight']
-            if G[u][v]['weight'] != G[x][y]['weight']:
-                swapcount += 1
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
+        G[u][v]['weight'], G[x][y]['weight'] = G[
+            x][y]['weight'], G[u][v]['weight']
+        if G[u][v]['weight'] != G[x][y]['weight']:
+            swapcount += 1
 
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -535,7 +530,9 @@ def sn_sign_swap(G, n_swap=1, max_tries=100):
     return G
 
 
-def sn_full_swap(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def sn_full_swap(G, n_swap=1, max_tries=100, block_size=None,
+                 inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -545,11 +542,17 @@ def sn_full_swap(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    block_size : int, optional
+        Draw the proposals block_size at a time with NumPy (see
+        block_swap). By default they are drawn one at a time.
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
-    Instead of choosing uniformly at random from a generated edge list,
-    this algorithm chooses nonuniformly from the set of nodes with probability weighted by degree.
+    The two edges are drawn uniformly from an edge array that is kept in
+    step with G, so a try costs O(1) whatever the degree of its nodes.
+    A CSRGraph is rewired in its own arrays and overlay (see csr_graph).
     The degree of each node and topological structure of this network changed after swap.
 
     See Also
@@ -558,33 +561,33 @@ def sn_full_swap(G, n_swap=1, max_tries=100):
 
     """
 
+    if not inplace:
+        G = clone_graph(G)
+
+    if block_size:
+        return block_swap(G, n_swap, max_tries, pattern='ux',
+                          block_size=block_size)
+
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)  # cdf of degree
+    edges = EdgeStore.of(G)
 
     while swapcount < n_swap:
-        # pick two random edges without creating edge list
-        # choose source node indices from discrete distribution
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue  # same source, skip
-        u = keys[ui]  # convert index to label
-        x = keys[xi]
-        # choose target uniformly from neighbors
-        if len(list(G[u])) > 0 and len(list(G[x])) > 0:
-            v = random.choice(list(G[u]))
-            y = random.choice(list(G[x]))
-            if v == y:
-                continue
-            if (x not in G[u]) and (y not in G[v]):
-                G.add_edge(u, x, weight=G[u][v]['weight'])
-                G.add_edge(v, y, weight=G[x][y]['weight'])
-                G.remove_edge(u, v)
-                G.remove_edge(x, y)
-                swapcount += 1
+        # pick two random edges from the edge array, i.e. a uniform edge
+        # (stub) u-v instead of a degree-weighted node u and a neighbour
+        u, v = edges.choice()
+        x, y = edges.choice()
+        if u == x or v == y:
+            continue  # same source or target, skip
+        if (x not in G[u]) and (y not in G[v]):
+            G.add_edge(u, x, weight=G[u][v]['weight'])
+            G.add_edge(v, y, weight=G[x][y]['weight'])
+            G.remove_edge(u, v)
+            G.remove_edge(x, y)
+            edges.swap([(u, v), (x, y)], [(u, x), (v, y)])
+            swapcount += 1
 
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
@@ -7,7 +7,15 @@ revised on Oct 15 2017
 
 import networkx as nx
 import random
-import copy
+
+from null_model_core.clone import clone_graph
+from null_model_core.community_chains import inner_swaps_parallel
+from null_model_core.community_index import CommunityEdges, CommunityIndex
+from null_model_core.connectivity import (CommunityConnectivity,
+                                         swap_connected, SwapWindow)
+from null_model_core.edge_store import DegreeBuckets
+from null_model_core.modularity import ModularityTracker
+from null_model_core.triangles import TriangleCounts
 
 
 __all__ = ['judge_error',
@@ -27,7 +35,10 @@ __all__ = ['judge_error',
            'Q_weaken' ]
 
 
-def judge_error(G, n_swap, max_tries, connected):
+def judge_error(G, n_swap, max_tries, connected, window=False):
+    if connected not in ((0, 1, 2) if window else (0, 1)):
+        raise nx.NetworkXError("connected must be 0 or 1%s." %
+                               (" or 2" if window else ""))
     if not nx.is_connected(G):
         raise nx.NetworkXError("For connected graphs only.")
     if G.is_directed():
@@ -43,17 +54,21 @@ def edge_in_community(node_community, edge):
 
     Parameters
     ----------
-    node_community : list
+    node_community : list or CommunityIndex
         nodes and the communities they belong to
     edge:
         an edge in the graph`12
 
     Notes
     -----
+    The null models compile node_community into a CommunityIndex once and
+    test edges with it in O(1); this scans every community.
 
     Examples
     --------
     """
+    if isinstance(node_community, CommunityIndex):
+        return node_community.edge_in_community(edge)
     return_value = 0
     for nc_i in node_community:
         if edge[0] in nc_i and edge[1] in nc_i:
@@ -86,14 +101,15 @@ def count_degree_nodes(degree_nodes):
     return degree_dict
 
 
-def inner_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
+def inner_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False, workers=None):
     """Returns a 1K null model beased on random reconnection algorithm inner community
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -101,23 +117,45 @@ def inner_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    workers : int, optional
+        Rewire every community in its own chain, in a pool of workers
+        processes (see inner_swaps_parallel); needs disjoint communities and
+        connected = 0
 
     Notes
     -----
     Keep the degree distribution unchanged and the graph connected.
     Swap edges inner communities.
+    With connected = 1 the connectivity is checked in the community of the
+    swap first (see CommunityConnectivity).
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if workers is not None and connected:
+        raise nx.NetworkXError("Parallel swaps need connected = 0.")
+    if not inplace:
+        G = clone_graph(G)
+    if workers is not None:
+        inner_swaps_parallel(G, CommunityIndex(node_community), n_swap,
+                             max_tries, workers)
+        return G
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    if connected == 1:
+        # searches the community of the swap first
+        guard = CommunityConnectivity(G, communities)
+    if connected == 2:
+        window = SwapWindow(G, edges=edges)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.intra) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -126,19 +164,16 @@ def inner_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly.
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inner community edges, x-y in the community of u-v)
+        u, v = edges.intra.choice()
+        x, y = edges.pool(u, v).choice()
         # Make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
                     # Make sure the new edges are not exist in the original
                     # graph.
                     if (y not in G[u]) and (v not in G[x]):
@@ -147,27 +182,35 @@ def inner_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
-                    # if connected = 1 but the original graph is not connected fully,
-                    # withdraw the operation about the swap of edges.
-                    if connected == 1:
-                        if not nx.is_connected(G):
-                            G.add_edge(u, v)
-                            G.add_edge(x, y)
-                            G.remove_edge(u, y)
-                            G.remove_edge(x, v)
-                            continue
-                    swapcount += 1
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        # if connected = 1 but the original graph is not connected fully,
+                        # withdraw the operation about the swap of edges.
+                        if connected == 1:
+                            if not guard.swap_connected([(u, v), (x, y)]):
+                                G.add_edge(u, v)
+                                G.add_edge(x, y)
+                                G.remove_edge(u, y)
+                                G.remove_edge(x, v)
+                                edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                continue
+                        swapcount += 1
+                        if connected == 2:
+                            swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                                     flush=swapcount == n_swap)
+    if connected == 2:
+        window.flush()
     return G
 
 
-def inner_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
+def inner_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False, workers=None, verbose=False):
     """Returns a 2K null model beased on random reconnection algorithm inner community
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -175,24 +218,58 @@ def inner_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    workers : int, optional
+        Rewire every community in its own chain, in a pool of workers
+        processes (see inner_swaps_parallel); needs disjoint communities and
+        connected = 0
+    verbose : bool (default = False)
+        Print the acceptance rate of the tries at the end
 
     Notes
     -----
     Keep the 2k-characteristic unchanged and the graph connected.
     Swap edges inner communities.
+    With connected = 1 the connectivity is checked in the community of the
+    swap first (see CommunityConnectivity).
+    The second edge x-y is drawn among the edges of the communities of u-v
+    whose end y has the degree of v and is in the community of v (see
+    DegreeBuckets and CommunityEdges.stub_key), for overlapping communities
+    among the inner (inter) community edges.
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if workers is not None and connected:
+        raise nx.NetworkXError("Parallel swaps need connected = 0.")
+    if not inplace:
+        G = clone_graph(G)
+    if workers is not None:
+        swapcount, n_try = inner_swaps_parallel(
+            G, CommunityIndex(node_community), n_swap, max_tries, workers,
+            degree_matched=True)
+        if verbose:
+            print('Acceptance rate: %s swaps in %s tries (%.1f%%).' %
+                  (swapcount, n_try, 100.0 * swapcount / max(n_try, 1)))
+        return G
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
-
-    while swapcount < n_swap:
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    if connected == 1:
+        # searches the community of the swap first
+        guard = CommunityConnectivity(G, communities)
+    # (the stubs of the pool of u-v that give edges of the same pools)
+    buckets = DegreeBuckets(G, key=edges.stub_key)
+    if connected == 2:
+        window = SwapWindow(G, edges=[edges, buckets])
+
+    while swapcount < n_swap and len(edges.intra) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -201,51 +278,60 @@ def inner_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly.
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (u-v is drawn among the inner community edges only)
+        u, v = edges.intra.choice()
+        # Keep the degree matching characteristic of nodes unchanged: y has
+        # the degree of v, and is in the community of v.
+        x, y = buckets.choice(buckets.bucket(u, v))
         # Make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
-                    # Keep the degree matching characteristic of nodes
-                    # unchanged.
-                    if G.degree(v) == G.degree(y):
-                        # Make sure the new edges are not exist in the original
-                        # graph.
-                        if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-                            # if connected = 1 but the original graph is not connected fully,
-                            # withdraw the operation about the swap of edges.
-                            if connected == 1:
-                                if not nx.is_connected(G):
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    continue
-                            swapcount += 1
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
+                    # Make sure the new edges are not exist in the original
+                    # graph.
+                    if (y not in G[u]) and (v not in G[x]):
+                        G.add_edge(u, y)
+                        G.add_edge(v, x)
+
+                        G.remove_edge(u, v)
+                        G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        # if connected = 1 but the original graph is not connected fully,
+                        # withdraw the operation about the swap of edges.
+                        if connected == 1:
+                            if not guard.swap_connected([(u, v), (x, y)]):
+                                G.add_edge(u, v)
+                                G.add_edge(x, y)
+                                G.remove_edge(u, y)
+                                G.remove_edge(x, v)
+                                edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                buckets.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                continue
+                        swapcount += 1
+                        if connected == 2:
+                            swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                                     flush=swapcount == n_swap)
+    if connected == 2:
+        swapcount -= window.flush()
+    if verbose:
+        print('Acceptance rate: %s swaps in %s tries (%.1f%%).' %
+              (swapcount, n_try, 100.0 * swapcount / max(n_try, 1)))
     return G
 
 
-def inner_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
+def inner_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1,
+                     inplace=False):
     """Returns a 2.5K null model beased on random reconnection algorithm inner community
 
     Parameters
     ----------
     G0 : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -253,24 +339,32 @@ def inner_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
     Keep the 2.5k-characteristic unchanged and the graph connected.
     Swap edges inner communities.
+    With connected = 1 the connectivity is checked in the community of the
+    swap first (see CommunityConnectivity).
 
     """
     judge_error(G0, n_swap, max_tries, connected)
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    if connected == 1:
+        # searches the community of the swap first
+        guard = CommunityConnectivity(G, communities)
+    triangles = TriangleCounts(G)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.intra) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -279,72 +373,51 @@ def inner_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inner community edges, x-y in the community of u-v)
+        u, v = edges.intra.choice()
+        x, y = edges.pool(u, v).choice()
         # Make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
                     # Keep the degree matching characteristic of nodes
                     # unchanged.
                     if G.degree(v) == G.degree(y):
                         # Make sure the new edges are not exist in the original
                         # graph.
                         if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-
-                            degree_node_list = map(lambda t: (t[1], t[0]), G0.degree(
-                                [u, v, x, y] + list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])).items())
-
-                            dict_degree = count_degree_nodes(degree_node_list)
-                            for i in range(len(dict_degree)):
-                                avcG0 = nx.average_clustering(
-                                    G0, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                                avcG = nx.average_clustering(
-                                    G, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                                i += 1
-                                # If the degree-related clustering coefficient changed after scrambling
-                                # withdraw this operation about scrambling.
-                                if avcG0 != avcG:
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    break
-                                # if connected = 1 but the original graph is not connected fully,
-                                # withdraw the operation about the swap of
-                                # edges.
-                                if connected == 1:
-                                    if not nx.is_connected(G):
-                                        G.add_edge(u, v)
-                                        G.add_edge(x, y)
-                                        G.remove_edge(u, y)
-                                        G.remove_edge(x, v)
-                                        continue
-                                swapcount += 1
+                            removed = [(u, v), (x, y)]
+                            added = [(u, y), (v, x)]
+                            delta = triangles.swap(removed, added)
+                            edges.swap(removed, added)
+                            # If the degree-related clustering coefficient, i.e. the
+                            # triangles of a degree class, changed after scrambling,
+                            # or if connected = 1 but the new graph is not connected
+                            # fully, withdraw this operation about scrambling.
+                            if triangles.class_delta(delta) or (
+                                    connected == 1 and not guard.swap_connected(removed)):
+                                G.remove_edges_from(added)
+                                G.add_edges_from(removed)
+                                edges.swap(added, removed)
+                                continue
+                            triangles.commit(delta)
+                            swapcount += 1
 
     return G
 
 
-def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
+def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False):
     """Returns a 3K null model beased on random reconnection algorithm inner community
 
     Parameters
     ----------
     G0 : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -352,11 +425,15 @@ def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
     Keep the 3k-characteristic unchanged and the graph connected.
     Swap edges inner communities.
+    With connected = 1 the connectivity is checked in the community of the
+    swap first (see CommunityConnectivity).
 
     """
     judge_error(G0, n_swap, max_tries, connected)
@@ -365,11 +442,15 @@ def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    G = copy.deepcopy(G0)
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
-
-    while swapcount < n_swap:
+    G = G0 if inplace else clone_graph(G0)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    if connected == 1:
+        # searches the community of the swap first
+        guard = CommunityConnectivity(G, communities)
+    triangles = TriangleCounts(G)
+
+    while swapcount < n_swap and len(edges.intra) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -378,19 +459,16 @@ def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inner community edges, x-y in the community of u-v)
+        u, v = edges.intra.choice()
+        x, y = edges.pool(u, v).choice()
         # Make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inter communities.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
                     # Keep the degree matching characteristic of nodes
                     # unchanged.
                     if G.degree(v) == G.degree(y):
@@ -398,49 +476,33 @@ def inner_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
                         # Make sure the new edges are not exist in the original
                         # graph.
                         if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-                            # Get the set of four nodes and their neighbor
-                            # nodes.
-                            node_list = [
-                                u, v, x, y] + list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])
-                            # Calculate the clustering coefficient of all these
-                            # nodes in the original graph and the new graph.
-                            avcG0 = nx.clustering(G0, nodes=node_list)
-                            avcG = nx.clustering(G, nodes=node_list)
-                            # Keep the clustering coefficient of four nodes equal.
-                            # Withdraw the operation about the swap of edges,
-                            # otherwise.
-                            if avcG0 != avcG:
-                                G.add_edge(u, v)
-                                G.add_edge(x, y)
-                                G.remove_edge(u, y)
-                                G.remove_edge(x, v)
+                            removed = [(u, v), (x, y)]
+                            added = [(u, y), (v, x)]
+                            delta = triangles.swap(removed, added)
+                            edges.swap(removed, added)
+                            # The degrees are kept, so the clustering coefficient of a
+                            # node changes iff its triangles do.  Withdraw the swap if
+                            # it changed any, or if connected = 1 but the new graph is
+                            # not connected fully.
+                            if triangles.node_delta(delta) or (
+                                    connected == 1 and not guard.swap_connected(removed)):
+                                G.remove_edges_from(added)
+                                G.add_edges_from(removed)
+                                edges.swap(added, removed)
                                 continue
-                            # if connected = 1 but the original graph is not connected fully,
-                            # withdraw the operation about the swap of edges.
-                            if connected == 1:
-                                if not nx.is_connected(G):
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    continue
                             swapcount += 1
     return G
 
 
-def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
+def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm inter communities
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -448,6 +510,9 @@ def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
@@ -455,17 +520,21 @@ def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
     Swap edges inter communities.
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    if connected == 2:
+        window = SwapWindow(G, edges=edges)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.inter) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -474,19 +543,16 @@ def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inter community edges)
+        u, v = edges.inter.choice()
+        x, y = edges.inter.choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
 
                     # Make sure the new edges are not exist in the original
                     # graph.
@@ -496,27 +562,35 @@ def inter_random_1k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
-                    # if connected = 1 but the original graph is not connected fully,
-                    # withdraw the operation about the swap of edges.
-                    if connected == 1:
-                        if not nx.is_connected(G):
-                            G.add_edge(u, v)
-                            G.add_edge(x, y)
-                            G.remove_edge(u, y)
-                            G.remove_edge(x, v)
-                            continue
-                    swapcount += 1
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        # if connected = 1 but the original graph is not connected fully,
+                        # withdraw the operation about the swap of edges.
+                        if connected == 1:
+                            if not swap_connected(G, [(u, v), (x, y)]):
+                                G.add_edge(u, v)
+                                G.add_edge(x, y)
+                                G.remove_edge(u, y)
+                                G.remove_edge(x, v)
+                                edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                continue
+                        swapcount += 1
+                        if connected == 2:
+                            swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                                     flush=swapcount == n_swap)
+    if connected == 2:
+        window.flush()
     return G
 
 
-def inter_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
+def inter_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False, keep_pairs=False, verbose=False):
     """Returns a 2K null model beased on random reconnection algorithm inter communities
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -524,24 +598,42 @@ def inter_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    keep_pairs : bool (default = False)
+        Also keep the number of edges between every pair of communities:
+        x-y is drawn among the edges between the communities of u-v, with y
+        in the community of v; ignored for overlapping communities
+    verbose : bool (default = False)
+        Print the acceptance rate of the tries at the end
 
     Notes
     -----
     Keep the 2k-characteristic unchanged and the graph connected.
     Swap edges inter communities.
+    The second edge x-y is drawn among the inter community edges whose end
+    y has the degree of v (see DegreeBuckets and CommunityEdges.stub_key).
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities, keyed=keep_pairs)
+    # (the inter community stubs, of the pair of communities of u-v if
+    # keep_pairs)
+    buckets = DegreeBuckets(G, key=edges.stub_key)
+    if connected == 2:
+        window = SwapWindow(G, edges=[edges, buckets])
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.inter) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -550,51 +642,60 @@ def inter_random_2k(G, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (u-v is drawn among the inter community edges only)
+        u, v = edges.inter.choice()
+        # Keep the degree matching characteristic of nodes unchanged: y has
+        # the degree of v.
+        x, y = buckets.choice(buckets.bucket(u, v))
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
-                    # Keep the degree matching characteristic of nodes
-                    # unchanged.
-                    if G.degree(v) == G.degree(y):
-                        # Make sure the new edges are not exist in the original
-                        # graph.
-                        if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-                            # if connected = 1 but the original graph is not connected fully,
-                            # withdraw the operation about the swap of edges.
-                            if connected == 1:
-                                if not nx.is_connected(G):
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    continue
-                            swapcount += 1
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
+                    # Make sure the new edges are not exist in the original
+                    # graph.
+                    if (y not in G[u]) and (v not in G[x]):
+                        G.add_edge(u, y)
+                        G.add_edge(v, x)
+
+                        G.remove_edge(u, v)
+                        G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        # if connected = 1 but the original graph is not connected fully,
+                        # withdraw the operation about the swap of edges.
+                        if connected == 1:
+                            if not swap_connected(G, [(u, v), (x, y)]):
+                                G.add_edge(u, v)
+                                G.add_edge(x, y)
+                                G.remove_edge(u, y)
+                                G.remove_edge(x, v)
+                                edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                buckets.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                                continue
+                        swapcount += 1
+                        if connected == 2:
+                            swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                                     flush=swapcount == n_swap)
+    if connected == 2:
+        swapcount -= window.flush()
+    if verbose:
+        print('Acceptance rate: %s swaps in %s tries (%.1f%%).' %
+              (swapcount, n_try, 100.0 * swapcount / max(n_try, 1)))
     return G
 
 
-def inter_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
+def inter_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1,
+                     inplace=False):
     """Returns a 2.5K null model beased on random reconnection algorithm inter communities
 
     Parameters
     ----------
     G0 : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -602,6 +703,8 @@ def inter_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
@@ -615,11 +718,12 @@ def inter_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    G = copy.deepcopy(G0)
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    G = G0 if inplace else clone_graph(G0)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    triangles = TriangleCounts(G)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.inter) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -628,72 +732,51 @@ def inter_random_25k(G0, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inter community edges)
+        u, v = edges.inter.choice()
+        x, y = edges.inter.choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
                     # Keep the degree matching characteristic of nodes
                     # unchanged.
                     if G.degree(v) == G.degree(y):
                         # Make sure the new edges are not exist in the original
                         # graph.
                         if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-
-                            degree_node_list = map(lambda t: (t[1], t[0]), G0.degree(
-                                [u, v, x, y] + list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])).items())
-
-                            dict_degree = count_degree_nodes(degree_node_list)
-                            for i in range(len(dict_degree)):
-                                avcG0 = nx.average_clustering(
-                                    G0, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                                avcG = nx.average_clustering(
-                                    G, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                                i += 1
-                                # If the degree-related clustering coefficient changed after scrambling
-                                # withdraw this operation about scrambling.
-                                if avcG0 != avcG:
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    break
-                                # if connected = 1 but the original graph is not connected fully,
-                                # withdraw the operation about the swap of
-                                # edges.
-                                if connected == 1:
-                                    if not nx.is_connected(G):
-                                        G.add_edge(u, v)
-                                        G.add_edge(x, y)
-                                        G.remove_edge(u, y)
-                                        G.remove_edge(x, v)
-                                        continue
-                                swapcount += 1
+                            removed = [(u, v), (x, y)]
+                            added = [(u, y), (v, x)]
+                            delta = triangles.swap(removed, added)
+                            edges.swap(removed, added)
+                            # If the degree-related clustering coefficient, i.e. the
+                            # triangles of a degree class, changed after scrambling,
+                            # or if connected = 1 but the new graph is not connected
+                            # fully, withdraw this operation about scrambling.
+                            if triangles.class_delta(delta) or (
+                                    connected == 1 and not swap_connected(G, removed)):
+                                G.remove_edges_from(added)
+                                G.add_edges_from(removed)
+                                edges.swap(added, removed)
+                                continue
+                            triangles.commit(delta)
+                            swapcount += 1
 
     return G
 
 
-def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
+def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1,
+                    inplace=False):
     """Returns a 3K null model beased on random reconnection algorithm inter communities
 
     Parameters
     ----------
     G0 : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
@@ -701,6 +784,8 @@ def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
@@ -714,11 +799,12 @@ def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    G = copy.deepcopy(G0)
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    G = G0 if inplace else clone_graph(G0)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    triangles = TriangleCounts(G)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.inter) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -727,19 +813,16 @@ def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inter community edges)
+        u, v = edges.inter.choice()
+        x, y = edges.inter.choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inter communities.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
                     # Keep the degree matching characteristic of nodes
                     # unchanged.
                     if G.degree(v) == G.degree(y):
@@ -747,54 +830,42 @@ def inter_random_3k(G0, node_community, n_swap=1, max_tries=100, connected=1):
                         # Make sure the new edges are not exist in the original
                         # graph.
                         if (y not in G[u]) and (v not in G[x]):
-                            G.add_edge(u, y)
-                            G.add_edge(v, x)
-
-                            G.remove_edge(u, v)
-                            G.remove_edge(x, y)
-
-                            # Get the set of four nodes and their neighbor
-                            # nodes.
-                            node_list = [
-                                u, v, x, y] + list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])
-                            # Calculate the clustering coefficient of all these
-                            # nodes in the original graph and the new graph.
-                            avcG0 = nx.clustering(G, nodes=node_list)
-                            avcG = nx.clustering(G, nodes=node_list)
-                            # Keep the clustering coefficient of four nodes equal.
-                            # Withdraw the operation about the swap of edges,
-                            # otherwise.
-                            if avcG0 != avcG:
-                                G.add_edge(u, v)
-                                G.add_edge(x, y)
-                                G.remove_edge(u, y)
-                                G.remove_edge(x, v)
+                            removed = [(u, v), (x, y)]
+                            added = [(u, y), (v, x)]
+                            delta = triangles.swap(removed, added)
+                            edges.swap(removed, added)
+                            # The degrees are kept, so the clustering coefficient of a
+                            # node changes iff its triangles do.  Withdraw the swap if
+                            # it changed any, or if connected = 1 but the new graph is
+                            # not connected fully.
+                            if triangles.node_delta(delta) or (
+                                    connected == 1 and not swap_connected(G, removed)):
+                                G.remove_edges_from(added)
+                                G.add_edges_from(removed)
+                                edges.swap(added, removed)
                                 continue
-                            # if connected = 1 but the original graph is not connected fully,
-                            # withdraw the operation about the swap of edges.
-                            if connected == 1:
-                                if not nx.is_connected(G):
-                                    G.add_edge(u, v)
-                                    G.add_edge(x, y)
-                                    G.remove_edge(u, y)
-                                    G.remove_edge(x, v)
-                                    continue
                             swapcount += 1
     return G
 
 
-def inner_community_swap(G, node_community, n_swap=1, max_tries=100):
+def inner_community_swap(G, node_community, n_swap=1, max_tries=100,
+                         inplace=False, workers=None):
     """
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    workers : int, optional
+        Rewire every community in its own chain, in a pool of workers
+        processes (see inner_swaps_parallel); needs disjoint communities
 
     Notes
     -----
@@ -802,17 +873,23 @@ def inner_community_swap(G, node_community, n_swap=1, max_tries=100):
     Swap edges inner communities.
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, 0)
+    if not inplace:
+        G = clone_graph(G)
+    if workers is not None:
+        inner_swaps_parallel(G, CommunityIndex(node_community), n_swap,
+                             max_tries, workers)
+        return G
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.intra) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -821,19 +898,16 @@ def inner_community_swap(G, node_community, n_swap=1, max_tries=100):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inner community edges, x-y in the community of u-v)
+        u, v = edges.intra.choice()
+        x, y = edges.pool(u, v).choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges created are inner community.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
                     # Make sure the new edges are not exist in the original
                     # graph.
                     if (y not in G[u]) and (v not in G[x]):
@@ -842,23 +916,27 @@ def inner_community_swap(G, node_community, n_swap=1, max_tries=100):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
 
                         swapcount += 1
     return G
 
 
-def inter_community_swap(G, node_community, n_swap=1, max_tries=100):
+def inter_community_swap(G, node_community, n_swap=1, max_tries=100,
+                         inplace=False):
     """
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
@@ -866,17 +944,19 @@ def inter_community_swap(G, node_community, n_swap=1, max_tries=100):
     Swap edges inter communities.
 
     """
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, 0)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
 
-    while swapcount < n_swap:
+    while swapcount < n_swap and len(edges.inter) >= 2:
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s)' % swapcount)
@@ -885,19 +965,16 @@ def inter_community_swap(G, node_community, n_swap=1, max_tries=100):
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inter community edges)
+        u, v = edges.inter.choice()
+        x, y = edges.inter.choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inter communities.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inter communities.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
                     # Make sure the new edges are not exist in the original
                     # graph.
                     if (y not in G[u]) and (v not in G[x]):
@@ -906,24 +983,39 @@ def inter_community_swap(G, node_community, n_swap=1, max_tries=100):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
 
                         swapcount += 1
 
     return G
 
 
-def Q_enhense(G, node_community, n_swap=1, max_tries=100):
+def Q_enhense(G, node_community, n_swap=1, max_tries=100, inplace=False,
+              target_Q=None, trajectory=False):
     """
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    target_Q : float, optional
+        Stop as soon as the modularity of G is at or above target_Q instead
+        of after n_swap swaps (see ModularityTracker)
+    trajectory : bool (default = False)
+        If True, also return the modularity before the first swap and after
+        every swap
+
+    Returns
+    -------
+    G : graph
+    Q : list of float, if trajectory is True
 
     Notes
     -----
@@ -932,38 +1024,50 @@ def Q_enhense(G, node_community, n_swap=1, max_tries=100):
 
     """
 
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, 0)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    modularity = ModularityTracker(G, communities)
+    Q = [modularity.q()]
 
-    while swapcount < n_swap:
+    while ((swapcount < n_swap or target_Q is not None) and
+           len(edges.inter) >= 2):
+        if target_Q is not None and Q[-1] >= target_Q:
+            break
         if n_try >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' %
-                  n_try + 'before desired swaps achieved (%s)' % swapcount)
+            if target_Q is None:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before desired swaps achieved (%s)' % swapcount)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before Q reached %s (Q = %.4f)' %
+                      (target_Q, Q[-1]))
             break
         n_try += 1
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (u-v among the inter community edges, x-y among the edges between
+        # the same two communities, with x in the community of v)
+        u, v = edges.inter.choice()
+        x, y = edges.pool(u, v).choice()
+        if not communities.same_community(v, x):
+            x, y = y, x
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inter communities.
-            if edge_in_community(node_community, (u, v)) == 0 and edge_in_community(node_community, (x, y)) == 0:
+            if communities.edge_in_community((u, v)) == 0 and communities.edge_in_community((x, y)) == 0:
                 # Make sure the edges created are inner community.
-                if edge_in_community(node_community, (u, y)) == 1 and edge_in_community(node_community, (v, x)) == 1:
+                if communities.edge_in_community((u, y)) == 1 and communities.edge_in_community((v, x)) == 1:
                     # Make sure the new edges are not exist in the original
                     # graph.
                     if (y not in G[u]) and (v not in G[x]):
@@ -972,24 +1076,43 @@ def Q_enhense(G, node_community, n_swap=1, max_tries=100):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        Q.append(Q[-1] + modularity.swap([(u, v), (x, y)],
+                                                         [(u, y), (v, x)]))
 
                         swapcount += 1
 
+    if trajectory:
+        return G, Q
     return G
 
 
-def Q_weaken(G, node_community, n_swap=1, max_tries=100):
+def Q_weaken(G, node_community, n_swap=1, max_tries=100, inplace=False,
+             target_Q=None, trajectory=False):
     """
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    node_community : list
-        nodes and the communities they belong to
+    node_community : list or CommunityIndex
+        nodes and the communities they belong to, a node may be in several
     n_swap : int (default = 1)
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    target_Q : float, optional
+        Stop as soon as the modularity of G is at or below target_Q instead
+        of after n_swap swaps (see ModularityTracker)
+    trajectory : bool (default = False)
+        If True, also return the modularity before the first swap and after
+        every swap
+
+    Returns
+    -------
+    G : graph
+    Q : list of float, if trajectory is True
 
     Notes
     -----
@@ -998,38 +1121,47 @@ def Q_weaken(G, node_community, n_swap=1, max_tries=100):
 
     """
 
-    udge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, 0)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    communities = CommunityIndex(node_community)
+    edges = CommunityEdges(G.edges(), communities)
+    modularity = ModularityTracker(G, communities)
+    Q = [modularity.q()]
 
-    while swapcount < n_swap:
+    while ((swapcount < n_swap or target_Q is not None) and
+           len(edges.intra) >= 2):
+        if target_Q is not None and Q[-1] <= target_Q:
+            break
         if n_try >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' %
-                  n_try + 'before desired swaps achieved (%s)' % swapcount)
+            if target_Q is None:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before desired swaps achieved (%s)' % swapcount)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before Q reached %s (Q = %.4f)' %
+                      (target_Q, Q[-1]))
             break
         n_try += 1
 
         # Keep the degree distribution unchanged,choose two edges (u-v,x-y)
         # randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        # (both among the inner community edges)
+        u, v = edges.intra.choice()
+        x, y = edges.intra.choice()
         # Make sure the four nodes are not repeated.
         if len(set([u, v, x, y])) == 4:
             # Make sure the chosen edges are inner community.
-            if edge_in_community(node_community, (u, v)) == 1 and edge_in_community(node_community, (x, y)) == 1:
+            if communities.edge_in_community((u, v)) == 1 and communities.edge_in_community((x, y)) == 1:
                 # Make sure the edges created are inter communities.
-                if edge_in_community(node_community, (u, y)) == 0 and edge_in_community(node_community, (v, x)) == 0:
+                if communities.edge_in_community((u, y)) == 0 and communities.edge_in_community((v, x)) == 0:
                     # Make sure the new edges are not exist in the original
                     # graph.
                     if (y not in G[u]) and (v not in G[x]):
@@ -1038,7 +1170,12 @@ def Q_weaken(G, node_community, n_swap=1, max_tries=100):
 
                         G.remove_edge(u, v)
                         G.remove_edge(x, y)
+                        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                        Q.append(Q[-1] + modularity.swap([(u, v), (x, y)],
+                                                         [(u, y), (v, x)]))
 
                         swapcount += 1
 
+    if trajectory:
+        return G, Q
     return G
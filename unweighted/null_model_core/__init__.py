@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the unweighted, weighted and signed null models.
+
+The modules live in one package, not as top-level modules next to the
+models, so that the weighted and signed models can put this directory on
+sys.path without their generic names (clone, connectivity, triangles,
+...) clashing with installed packages.
+"""
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental degree assortativity for the (dis)assortative null models.
+
+The degree assortativity coefficient r is the Pearson correlation of the
+degrees at the two ends of the edges.  A double-edge swap keeps every
+degree, so of the sums that make up r only the sum of the degree products
+over the edges changes, by the products of the two new edges minus those
+of the two old ones.  r is then known after every swap in O(1), and a
+chain can stop as soon as it reaches a target value.
+"""
+
+__all__ = ['AssortativityTracker']
+
+
+class AssortativityTracker(object):
+    """Degree assortativity coefficient of a graph under double-edge swaps.
+
+    Parameters
+    ----------
+    G : undirected graph
+        The graph being rewired; swaps must keep the degree of every node
+
+    Notes
+    -----
+    With m edges, P the sum of d_u d_v, S2 the sum of d_u + d_v and S3
+    the sum of d_u^2 + d_v^2 over the edges u-v,
+
+        r = (P / m - (S2 / 2m)^2) / (S3 / 2m - (S2 / 2m)^2)
+
+    which is nx.degree_assortativity_coefficient.  S2 and S3 are fixed
+    by the degrees.
+
+    Examples
+    --------
+    >>> assortativity = AssortativityTracker(G)
+    >>> delta = assortativity.delta([(u, v), (x, y)], [(u, y), (v, x)])
+    >>> assortativity.r(delta)  # r after the swap
+    >>> assortativity.commit(delta)
+    """
+
+    def __init__(self, G):
+        self.degree = dict(G.degree())
+        self.m = 0
+        self.product = 0
+        s2 = s3 = 0
+        for u, v in G.edges():
+            du, dv = self.degree[u], self.degree[v]
+            self.m += 1
+            self.product += du * dv
+            s2 += du + dv
+            s3 += du * du + dv * dv
+        if self.m:
+            self._mean = s2 / (2.0 * self.m)
+            self._var = s3 / (2.0 * self.m) - self._mean ** 2
+        else:
+            self._mean = self._var = 0.0
+
+    def delta(self, removed, added):
+        """Returns the change of the sum of the degree products when the
+        edges removed are replaced by the edges added."""
+        degree = self.degree
+        return (sum(degree[a] * degree[b] for a, b in added) -
+                sum(degree[a] * degree[b] for a, b in removed))
+
+    def commit(self, delta):
+        """Add a delta returned by ``delta`` to the sum of the products."""
+        self.product += delta
+
+    def r(self, delta=0):
+        """Returns the assortativity coefficient, after the change delta if
+        given; nan if all the edge ends have the same degree."""
+        if self._var <= 0:
+            return float('nan')
+        return ((self.product + delta) / float(self.m) - self._mean ** 2) / \
+            self._var
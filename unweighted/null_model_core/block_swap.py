@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Block-vectorized double-edge swaps.
+
+The swap loops make several Python-level random draws and a
+set([u, v, x, y]) check on every try.  Here the proposals (pairs of edge
+slots) are drawn block_size at a time with NumPy, proposals that share an
+endpoint or would create an existing edge are rejected with array
+operations, and only the survivors are applied to the graph, one by one
+and in order.
+"""
+
+import networkx as nx
+import numpy as np
+
+from .connectivity import swap_connected, SwapWindow
+from .csr_graph import CSRGraph
+
+
+__all__ = ['EdgeArrays',
+           'block_swap']
+
+
+class EdgeArrays(object):
+    """Edge arrays of a graph with integer node ids.
+
+    Parameters
+    ----------
+    G : graph or CSRGraph
+
+    Notes
+    -----
+    Slot i holds the edge ``nodes[src[i]] - nodes[dst[i]]``.  Every edge
+    has a packed integer key, ``a * n + b`` with ``a < b`` for undirected
+    graphs, and a dict maps the keys to the slots.
+
+    Edits go to the Python lists and the dict only; the slots and keys they
+    change are collected in ``touched`` and ``changed``.  ``reset`` copies
+    the touched slots to the arrays, in time proportional to the changes.
+    """
+
+    def __init__(self, G):
+        self.directed = G.is_directed()
+        if isinstance(G, CSRGraph):
+            self.nodes = G.labels
+            self.index = G.index
+            src, dst, self.weights, self.edge_data = G.edge_arrays()
+            src, dst = src.tolist(), dst.tolist()
+        else:
+            self.nodes = list(G)
+            self.index = dict((node, i) for i, node in enumerate(self.nodes))
+            src = []
+            dst = []
+            for u, v in G.edges():
+                src.append(self.index[u])
+                dst.append(self.index[v])
+        self.n = len(self.nodes)
+        self.src, self.dst = src, dst
+        self._pos = {}
+        for i, (a, b) in enumerate(zip(src, dst)):
+            self._pos[self.key(a, b)] = i
+        self.src_array = np.array(src, dtype=np.int64)
+        self.dst_array = np.array(dst, dtype=np.int64)
+        self.key_array = self.key(self.src_array, self.dst_array)
+        self.touched = set()
+        self.changed = set()
+
+    def __len__(self):
+        return len(self.src)
+
+    def __contains__(self, key):
+        return key in self._pos
+
+    def key(self, a, b):
+        """Returns the key of the edge a-b, for node ids or arrays of them."""
+        if self.directed:
+            return a * self.n + b
+        if isinstance(a, np.ndarray):
+            return np.minimum(a, b) * self.n + np.maximum(a, b)
+        if a < b:
+            return a * self.n + b
+        return b * self.n + a
+
+    def has(self, a, b):
+        """Returns True if the edge a-b (node ids) is stored."""
+        return self.key(a, b) in self._pos
+
+    def replace(self, i, a, b):
+        """Store the edge a-b (node ids) in slot i instead of its edge."""
+        # this is the inner loop of block_swap, so self.key is inlined
+        n = self.n
+        c, d = self.src[i], self.dst[i]
+        if self.directed:
+            old, new = c * n + d, a * n + b
+        else:
+            old = c * n + d if c < d else d * n + c
+            new = a * n + b if a < b else b * n + a
+        pos = self._pos
+        del pos[old]
+        pos[new] = i
+        self.src[i] = a
+        self.dst[i] = b
+        self.changed.update((old, new))
+        self.touched.add(i)
+
+    def swap(self, removed, added):
+        """Replace removed[i] by added[i] (node labels), as EdgeStore.swap,
+        so that a SwapWindow can roll the arrays back."""
+        index = self.index
+        for (u, v), (x, y) in zip(removed, added):
+            i = self._pos[self.key(index[u], index[v])]
+            self.replace(i, index[x], index[y])
+
+    def reset(self):
+        """Bring the arrays up to date and forget the changed slots and
+        keys."""
+        if self.touched:
+            slots = np.fromiter(self.touched, dtype=np.int64,
+                                count=len(self.touched))
+            src, dst = self.src, self.dst
+            self.src_array[slots] = [src[i] for i in slots.tolist()]
+            self.dst_array[slots] = [dst[i] for i in slots.tolist()]
+            self.key_array[slots] = self.key(self.src_array[slots],
+                                             self.dst_array[slots])
+        self.touched.clear()
+        self.changed.clear()
+
+
+def _move_edges(G, removed, added):
+    # replace removed[i] by added[i] in G, added[i] taking the attributes
+    # of removed[i]; all removals come first, an edge may be re-added
+    data = [G[u][v] for u, v in removed]
+    G.remove_edges_from(removed)
+    G.add_edges_from((u, v, d) for (u, v), d in zip(added, data))
+
+
+def _write_back(G, edges, src0, dst0):
+    # G still holds the edges src0-dst0, replace the slots that changed
+    edges.reset()
+    if isinstance(G, CSRGraph):
+        G.set_edges(edges.src_array, edges.dst_array, edges.weights,
+                    edges.edge_data)
+        return
+    nodes = edges.nodes
+    slots = np.flatnonzero((edges.src_array != src0) |
+                           (edges.dst_array != dst0)).tolist()
+    _move_edges(G, [(nodes[src0[i]], nodes[dst0[i]]) for i in slots],
+                [(nodes[edges.src[i]], nodes[edges.dst[i]]) for i in slots])
+
+
+def block_swap(G, n_swap, max_tries, pattern='uy', connected=0,
+               block_size=1000000, reciprocal=False):
+    """Performs double-edge swaps on G with proposals drawn in NumPy blocks.
+
+    Parameters
+    ----------
+    G : graph or CSRGraph
+        The graph to rewire, in place
+    n_swap : int
+        Number of swaps to perform
+    max_tries : int
+        Maximum number of attempts to swap edges
+    pattern : 'uy' or 'ux' (default = 'uy')
+        'uy' turns u-v, x-y into u-y, x-v, which keeps every degree.
+        'ux' turns u-v, x-y into u-x, v-y (the signed full swaps).
+        In both cases the new edges take the attributes of u-v and x-y.
+    connected : int (default = 0)
+        keep the connectivity of the graph or not.
+        1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    block_size : int (default = 1000000)
+        Maximum number of proposals drawn at a time
+    reciprocal : bool (default = False)
+        With 'ux', also reject the swap if x->u or y->v exists
+
+    Returns
+    -------
+    G : graph
+
+    Notes
+    -----
+    A proposal is a pair of edge slots (i, j), with a random orientation
+    for the second edge of an undirected graph.  Proposals with i == j,
+    with coinciding endpoints or that would create an existing edge are
+    rejected with array operations on the state at the start of the block.
+    The slots and edges changed by the swaps applied since are tracked, and
+    a proposal that uses one of them is checked again on the current edges,
+    so the chain is the same as with one proposal at a time.  Unless
+    connectivity is checked, G itself is only updated once at the end.
+    A CSRGraph is rewired without going through networkx; its edge slots,
+    and with them the weights and attributes, are written back in order.
+    The proposals come from numpy.random, seed it for reproducible runs.
+    """
+    if pattern not in ('uy', 'ux'):
+        raise nx.NetworkXError("pattern must be 'uy' or 'ux'.")
+    csr = isinstance(G, CSRGraph)
+    if csr and connected:
+        raise nx.NetworkXError("connected swaps need a networkx graph.")
+    edges = EdgeArrays(G)
+    nodes = edges.nodes
+    key = edges.key
+    m = len(edges)
+    src0, dst0 = edges.src_array.copy(), edges.dst_array.copy()
+    if connected == 2:
+        window = SwapWindow(G, edges=edges)
+
+    def new_keys(u, v, x, y):
+        # keys of the edges that must not exist yet, for ids or arrays
+        if pattern == 'uy':
+            return (key(u, y), key(x, v))
+        if reciprocal:
+            return (key(u, x), key(v, y), key(x, u), key(y, v))
+        return (key(u, x), key(v, y))
+
+    def valid(i, j, u, v, x, y):
+        if i == j or u == x or v == y:
+            return False
+        if pattern == 'uy' and (u == y or v == x):
+            return False
+        for k in new_keys(u, v, x, y):
+            if k in edges:
+                return False
+        return True
+
+    n_try = 0
+    swapcount = 0
+    while swapcount < n_swap and n_try < max_tries:
+        # draw about as many proposals as the remaining swaps need, and few
+        # enough that the swaps of the block touch only ~10% of the edges
+        # (proposals using those must be checked again one by one)
+        rate = (swapcount + 1.0) / (n_try + 1) if n_try else 1.0
+        size = min(block_size, max_tries - n_try,
+                   int(1.25 * (n_swap - swapcount) / rate) + 1000,
+                   int(0.05 * m / rate) + 1000)
+        edges.reset()
+        I = np.random.randint(0, m, size)
+        J = np.random.randint(0, m, size)
+        U, V = edges.src_array[I], edges.dst_array[I]
+        X, Y = edges.src_array[J], edges.dst_array[J]
+        if edges.directed:
+            flip = np.zeros(size, dtype=bool)
+        else:
+            flip = np.random.randint(0, 2, size).astype(bool)
+            X, Y = np.where(flip, Y, X), np.where(flip, X, Y)
+        ok = (I != J) & (U != X) & (V != Y)
+        if pattern == 'uy':
+            ok &= (U != Y) & (V != X)
+        keys = new_keys(U, V, X, Y)
+        stored = np.sort(edges.key_array)
+        for k in keys:
+            i = np.searchsorted(stored, k)
+            i[i == m] = 0
+            ok &= stored[i] != k
+
+        # A rejected proposal can only turn valid if one of its slots is
+        # rewritten, or if an edge it must not create is removed, which
+        # first happens when the slot holding that edge is rewritten.  Only
+        # candidates rewrite slots, so grow the candidates from the
+        # survivors until no rejected proposal depends on their slots.
+        cand = ok.copy()
+        new = np.flatnonzero(ok)
+        rest = np.flatnonzero(~ok)
+        while len(new) and len(rest):
+            S = np.concatenate((I[new], J[new]))
+            dep = np.isin(I[rest], S) | np.isin(J[rest], S)
+            held = edges.key_array[S]
+            for k in keys:
+                dep |= np.isin(k[rest], held)
+            new = rest[dep]
+            rest = rest[~dep]
+            cand[new] = True
+        cand = np.flatnonzero(cand)
+
+        rows = list(zip(*[k[cand].tolist() for k in keys]))
+        ok, flip = ok[cand].tolist(), flip[cand].tolist()
+        I, J = I[cand].tolist(), J[cand].tolist()
+        U, V = U[cand].tolist(), V[cand].tolist()
+        X, Y = X[cand].tolist(), Y[cand].tolist()
+        touched, changed = edges.touched, edges.changed
+        last = size - 1
+        for t, p in enumerate(cand.tolist()):
+            i, j = I[t], J[t]
+            if touched and (i in touched or j in touched or
+                            not changed.isdisjoint(rows[t])):
+                # checked on an older state, check it again
+                u, v = edges.src[i], edges.dst[i]
+                x, y = edges.src[j], edges.dst[j]
+                if flip[t]:
+                    x, y = y, x
+                if not valid(i, j, u, v, x, y):
+                    continue
+            elif ok[t]:
+                u, v, x, y = U[t], V[t], X[t], Y[t]
+            else:
+                continue
+
+            if pattern == 'uy':
+                a, b, c, d = u, y, x, v
+            else:
+                a, b, c, d = u, x, v, y
+            edges.replace(i, a, b)
+            edges.replace(j, c, d)
+            if connected:
+                removed = [(nodes[u], nodes[v]), (nodes[x], nodes[y])]
+                added = [(nodes[a], nodes[b]), (nodes[c], nodes[d])]
+                _move_edges(G, removed, added)
+                if connected == 1 and not swap_connected(G, removed):
+                    _move_edges(G, added, removed)
+                    edges.swap(added, removed)
+                    continue
+            swapcount += 1
+            if connected == 2:
+                swapcount -= window.push(removed, added,
+                                         flush=swapcount == n_swap)
+            if swapcount >= n_swap:
+                last = p
+                break
+        n_try += last + 1
+
+    if connected == 2:
+        swapcount -= window.flush()
+    if not connected:
+        # G was left alone during the chain, write the changed slots back
+        _write_back(G, edges, src0, dst0)
+    if swapcount < n_swap:
+        print('Maximum number of swap attempts (%s) exceeded ' %
+              n_try + 'before desired swaps achieved (%s).' % n_swap)
+    return G
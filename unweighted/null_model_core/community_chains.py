@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Inner-community swaps run community by community in a process pool.
+
+A swap of inner_random_1k, inner_random_2k or inner_community_swap takes
+two edges of one community and puts back two edges of the same
+community, so with disjoint communities and no connectivity check each
+community is an independent chain.  inner_swaps_parallel gives every
+community its share of the swaps and tries, in proportion to its number
+of edges, runs the chains on their own edge sets in worker processes and
+writes the rewired edges back into the graph.
+"""
+
+import multiprocessing
+import os
+import random
+
+import networkx as nx
+
+from .community_index import CommunityEdges
+from .edge_store import DegreeBuckets, EdgeStore
+
+
+__all__ = ['inner_swaps_parallel']
+
+
+def _split(total, sizes):
+    # total split in proportion to sizes, by largest remainder
+    whole = sum(sizes)
+    shares = [total * size // whole for size in sizes]
+    rest = sorted(range(len(sizes)),
+                  key=lambda i: -(total * sizes[i] % whole))
+    for i in rest[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _chain(task):
+    # the swaps of one community, on its own edges; returns the new edges
+    edges, n_swap, max_tries, degree, seed = task
+    random.seed(seed)
+    H = nx.Graph()
+    H.add_edges_from(edges)
+    store = EdgeStore(edges)
+    buckets = DegreeBuckets(H, degree) if degree is not None else None
+    n_try = 0
+    swapcount = 0
+    while swapcount < n_swap and n_try < max_tries:
+        n_try += 1
+        u, v = store.choice()
+        if buckets is None:
+            x, y = store.choice()
+        else:
+            x, y = buckets.choice(degree[v])
+        if len(set([u, v, x, y])) < 4 or y in H[u] or v in H[x]:
+            continue
+        H.add_edge(u, y)
+        H.add_edge(v, x)
+        H.remove_edge(u, v)
+        H.remove_edge(x, y)
+        store.swap([(u, v), (x, y)], [(u, y), (v, x)])
+        if buckets is not None:
+            buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])
+        swapcount += 1
+    return store.edges(), swapcount, n_try
+
+
+def inner_swaps_parallel(G, communities, n_swap, max_tries, workers=None,
+                         degree_matched=False):
+    """Rewires G in place with inner-community swaps, one chain per
+    community.
+
+    Parameters
+    ----------
+    G : undirected graph
+    communities : CommunityIndex
+        Disjoint communities
+    n_swap : int
+        Number of double-edge swaps, split over the communities in
+        proportion to their numbers of edges
+    max_tries : int
+        Maximum number of attempts to swap edges, split likewise
+    workers : int, optional
+        Number of worker processes, by default one per CPU.  With 1 the
+        chains run one after another in this process.
+    degree_matched : bool (default = False)
+        Draw x-y with deg(y) == deg(v), degrees in G, as inner_random_2k
+
+    Returns
+    -------
+    swapcount : int
+        Number of swaps done
+    n_try : int
+        Number of attempts
+
+    Notes
+    -----
+    There is no connectivity check.  The seed of every chain is drawn
+    from random, largest community first, so the result only depends on
+    the state of random and not on the number of workers.
+    """
+    if communities.overlapping:
+        raise nx.NetworkXError("Parallel swaps need disjoint communities.")
+    pools = CommunityEdges(G.edges(), communities)
+    groups = sorted((key, store.edges()) for key, store in pools.pairs.items()
+                    if key[0] == key[1] >= 0 and len(store) >= 2)
+    # largest community first, the pool starts on the longest chains
+    groups.sort(key=lambda group: -len(group[1]))
+    if not groups:
+        return 0, 0
+    sizes = [len(edges) for key, edges in groups]
+    degree = dict(G.degree()) if degree_matched else None
+    tasks = []
+    for (key, edges), n, tries in zip(groups, _split(n_swap, sizes),
+                                      _split(max_tries, sizes)):
+        nodes = set(node for edge in edges for node in edge)
+        tasks.append((edges, n, tries,
+                      None if degree is None else
+                      dict((node, degree[node]) for node in nodes),
+                      random.getrandbits(32)))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        results = [_chain(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(_chain, tasks, chunksize=1)
+        finally:
+            pool.terminate()
+            pool.join()
+    swapcount = 0
+    n_try = 0
+    for (key, edges), (new_edges, count, tries) in zip(groups, results):
+        G.remove_edges_from(edges)
+        G.add_edges_from(new_edges)
+        swapcount += count
+        n_try += tries
+    if swapcount < n_swap:
+        print('Maximum number of swap attempts (%s) exceeded ' %
+              n_try + 'before desired swaps achieved (%s)' % swapcount)
+    return swapcount, n_try
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Community membership compiled once for the community null models.
+
+edge_in_community looped over every community of node_community and
+tested list membership for both ends of the edge, O(n) per call and four
+calls per try.  CommunityIndex maps every node to the integer label of
+its community, so an edge is tested with two dict lookups.  In an
+overlapping partition a node maps to a bitset (an int with bit i set for
+community i), and two nodes share a community iff their bitsets do.
+
+CommunityEdges splits the edges into an intra-community and an
+inter-community pool (and, for a partition, one pool per pair of
+communities), so that the models draw only edges they can swap.
+"""
+
+from .edge_store import EdgeStore
+
+
+__all__ = ['CommunityIndex',
+           'CommunityEdges']
+
+
+class CommunityIndex(object):
+    """Community label of every node.
+
+    Parameters
+    ----------
+    node_community : list of lists of nodes, or CommunityIndex
+        The communities; a node may be in several of them and nodes may be
+        in none
+    overlapping : bool, optional
+        Keep membership bitsets instead of labels.  By default bitsets are
+        only used if a node is in more than one community.
+
+    Examples
+    --------
+    >>> communities = CommunityIndex([[1, 2, 3], [4, 5]])
+    >>> communities.edge_in_community((1, 3)), communities.label[4]
+    (1, 1)
+    """
+
+    def __init__(self, node_community, overlapping=None):
+        if isinstance(node_community, CommunityIndex):
+            node_community = node_community.communities()
+        mask = {}
+        for i, nodes in enumerate(node_community):
+            bit = 1 << i
+            for node in nodes:
+                mask[node] = mask.get(node, 0) | bit
+        self.n_communities = len(node_community)
+        if overlapping is None:
+            overlapping = any(b & (b - 1) for b in mask.values())
+        self.overlapping = overlapping
+        if overlapping:
+            self.label = None
+            self.mask = mask
+        else:
+            self.label = dict((node, b.bit_length() - 1)
+                              for node, b in mask.items())
+            self.mask = None
+
+    def communities(self):
+        """Returns the communities as a list of lists of nodes."""
+        communities = [[] for _ in range(self.n_communities)]
+        if self.overlapping:
+            for node, b in self.mask.items():
+                while b:
+                    low = b & -b
+                    communities[low.bit_length() - 1].append(node)
+                    b ^= low
+        else:
+            for node, i in self.label.items():
+                communities[i].append(node)
+        return communities
+
+    def same_community(self, u, v):
+        """Returns True if u and v are in a common community."""
+        if self.overlapping:
+            return bool(self.mask.get(u, 0) & self.mask.get(v, 0))
+        lu = self.label.get(u)
+        return lu is not None and lu == self.label.get(v)
+
+    def edge_in_community(self, edge):
+        """Returns 1 if the edge is inside a community, 0 otherwise, like
+        edge_in_community of null_model_community."""
+        return 1 if self.same_community(edge[0], edge[1]) else 0
+
+
+class CommunityEdges(object):
+    """Edges of a graph pooled by the communities of their ends.
+
+    Parameters
+    ----------
+    edges : iterable of (u, v) pairs
+    communities : CommunityIndex
+    keyed : bool (default = True)
+        Also keep a pool per pair of communities; ignored for overlapping
+        communities
+
+    Attributes
+    ----------
+    intra : EdgeStore
+        The edges inside a community
+    inter : EdgeStore
+        The edges between communities
+
+    Notes
+    -----
+    ``swap`` moves the edges to the pools of their new ends, so it can
+    replace EdgeStore.swap in the swap loops and in SwapWindow.
+
+    Examples
+    --------
+    >>> edges = CommunityEdges(G.edges(), CommunityIndex(node_community))
+    >>> u, v = edges.intra.choice()
+    >>> x, y = edges.pool(u, v).choice()  # an edge of the community of u
+    """
+
+    def __init__(self, edges, communities, keyed=True):
+        self.communities = communities
+        self.keyed = keyed and not communities.overlapping
+        self.intra = EdgeStore()
+        self.inter = EdgeStore()
+        self.pairs = {}
+        for u, v in edges:
+            self.add(u, v)
+
+    def __len__(self):
+        return len(self.intra) + len(self.inter)
+
+    def _key(self, u, v):
+        lu = self.communities.label.get(u, -1)
+        lv = self.communities.label.get(v, -1)
+        return (lu, lv) if lu <= lv else (lv, lu)
+
+    def pool(self, u, v):
+        """Returns the pool of the edges between the communities of u and
+        v: the pool of that pair of communities if keyed, the intra or
+        inter pool otherwise."""
+        if self.keyed:
+            return self.pairs[self._key(u, v)]
+        if self.communities.same_community(u, v):
+            return self.intra
+        return self.inter
+
+    def stub_key(self, u, v):
+        """Returns the key of the pool of u-v and of the community of v,
+        for DegreeBuckets: a stub (x, y) of the key of (u, v) gives the
+        edges u-y and v-x of the same pools as u-v, if keyed."""
+        if self.keyed:
+            return self._key(u, v), self.communities.label.get(v, -1)
+        return self.communities.same_community(u, v)
+
+    def add(self, u, v):
+        """Add the edge u-v to its pools."""
+        if self.communities.same_community(u, v):
+            self.intra.add(u, v)
+        else:
+            self.inter.add(u, v)
+        if self.keyed:
+            key = self._key(u, v)
+            if key not in self.pairs:
+                self.pairs[key] = EdgeStore()
+            self.pairs[key].add(u, v)
+
+    def remove(self, u, v):
+        """Remove the edge u-v from its pools."""
+        if self.communities.same_community(u, v):
+            self.intra.remove(u, v)
+        else:
+            self.inter.remove(u, v)
+        if self.keyed:
+            self.pairs[self._key(u, v)].remove(u, v)
+
+    def swap(self, removed, added):
+        """Replace the edges removed by the edges added."""
+        for u, v in removed:
+            self.remove(u, v)
+        for u, v in added:
+            self.add(u, v)
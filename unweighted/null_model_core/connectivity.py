@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Connectivity guards for the swap-based null models.
+
+With connected = 1 every accepted swap used to call nx.is_connected(G),
+a full O(n + m) traversal.  A swap only removes a few edges from a graph
+that was connected before, so it is enough to ask whether the endpoints
+of the removed edges can still reach each other.
+
+A swap inside a community can only cut the graph through that community,
+so CommunityConnectivity first searches the community subgraph alone,
+O(size of the community).
+"""
+
+from itertools import chain
+
+
+__all__ = ['bidirectional_reachable',
+           'swap_connected',
+           'CommunityConnectivity',
+           'SwapWindow']
+
+
+def _neighbors(G):
+    if G.is_directed():
+        # weak connectivity: follow edges in both directions
+        return lambda n: chain(G.succ[n], G.pred[n])
+    return lambda n: G.adj[n]
+
+
+def bidirectional_reachable(G, source, target, within=None):
+    """Returns True if target can be reached from source, False otherwise.
+
+    Two breadth-first searches are grown from source and target, always
+    expanding the smaller frontier, and the search stops as soon as they
+    meet.  Directed graphs are searched as undirected ones.
+
+    Parameters
+    ----------
+    G : graph
+    source, target : nodes of G
+    within : set, optional
+        Only follow paths through these nodes
+    """
+    return _bidirectional(G, source, target, within)[0]
+
+
+def _bidirectional(G, source, target, within=None):
+    # returns (True, None) if the searches meet, else (False, seen) with
+    # seen the nodes of the search that ran out, a whole component
+    if source == target:
+        return True, None
+    neighbors = _neighbors(G)
+    seen_s, seen_t = set([source]), set([target])
+    front_s, front_t = [source], [target]
+    while front_s and front_t:
+        if len(front_s) > len(front_t):
+            front_s, front_t = front_t, front_s
+            seen_s, seen_t = seen_t, seen_s
+        next_front = []
+        for n in front_s:
+            for w in neighbors(n):
+                if w in seen_t:
+                    return True, None
+                if w not in seen_s and (within is None or w in within):
+                    seen_s.add(w)
+                    next_front.append(w)
+        front_s = next_front
+    return False, seen_s if not front_s else seen_t
+
+
+def swap_connected(G, removed):
+    """Returns True if G is still connected after removing some edges.
+
+    Parameters
+    ----------
+    G : graph
+        The graph after the swap. It must have been connected before.
+    removed : list
+        The edges that were taken out by the swap, e.g. [(u, v), (x, y)]
+
+    Notes
+    -----
+    Every component of G contains an endpoint of a removed edge, so G is
+    connected iff these endpoints are mutually reachable.  Endpoints that
+    are adjacent are merged first; a bidirectional search is run only for
+    the groups that remain, which is one search for a double-edge swap.
+    For a long list of removed edges a single search from one endpoint
+    that stops once all the others are found is used instead.
+    """
+    return _swap_connected(G, removed, lambda a, b:
+                           bidirectional_reachable(G, a, b))
+
+
+def _swap_connected(G, removed, reachable):
+    nodes = []
+    for e in removed:
+        for n in e[:2]:
+            nodes.append(n)
+    nodes = list(dict.fromkeys(nodes))
+    if len(nodes) > 8:
+        return _reaches_all(G, nodes[0], nodes[1:])
+    group = dict((n, n) for n in nodes)
+
+    def find(n):
+        while group[n] != n:
+            n = group[n]
+        return n
+
+    if G.is_directed():
+        def adjacent(a, b):
+            return b in G.succ[a] or b in G.pred[a]
+    else:
+        def adjacent(a, b):
+            return b in G.adj[a]
+
+    for i, a in enumerate(nodes):
+        for b in nodes[i + 1:]:
+            if adjacent(a, b):
+                group[find(b)] = find(a)
+    root = nodes[0]
+    for n in nodes[1:]:
+        if find(n) != find(root):
+            if not reachable(root, n):
+                return False
+            group[find(n)] = find(root)
+    return True
+
+
+def _reaches_all(G, source, targets):
+    neighbors = _neighbors(G)
+    left = set(targets)
+    left.discard(source)
+    seen = set([source])
+    front = [source]
+    while front and left:
+        next_front = []
+        for n in front:
+            for w in neighbors(n):
+                if w not in seen:
+                    seen.add(w)
+                    left.discard(w)
+                    next_front.append(w)
+        front = next_front
+    return not left
+
+
+class CommunityConnectivity(object):
+    """Connectivity check for swaps inside one community.
+
+    Parameters
+    ----------
+    G : undirected graph
+        The graph being rewired. It must be connected.
+    communities : CommunityIndex
+
+    Notes
+    -----
+    After a swap inside community c, the ends of the removed edges are
+    first searched for within the subgraph of c, as in swap_connected.
+    If one of them is cut off there, the part of c it was searched in is
+    a whole component of the subgraph of c: without a node that has an
+    edge out of c (a bridge end, cached once) it is a component of G and
+    G is disconnected.  Only otherwise is the whole graph searched.
+
+    The bridge ends are valid as long as the edges between communities
+    do not change, as in the inner_* models.  Swaps that are not inside
+    a single community of a partition go to swap_connected.
+
+    Examples
+    --------
+    >>> guard = CommunityConnectivity(G, CommunityIndex(node_community))
+    >>> # after applying a swap to G
+    >>> guard.swap_connected([(u, v), (x, y)])
+    """
+
+    def __init__(self, G, communities):
+        self.G = G
+        self.communities = communities
+        self.members = {}
+        if not communities.overlapping:
+            for node, c in communities.label.items():
+                self.members.setdefault(c, set()).add(node)
+        self.bridge_ends = set()
+        for u, v in G.edges():
+            if not communities.same_community(u, v):
+                self.bridge_ends.add(u)
+                self.bridge_ends.add(v)
+
+    def swap_connected(self, removed):
+        """Returns True if G is still connected after removing the edges
+        removed."""
+        if self.communities.overlapping:
+            return swap_connected(self.G, removed)
+        label = self.communities.label
+        c = label.get(removed[0][0])
+        if c is None or any(label.get(n) != c for e in removed
+                            for n in e[:2]):
+            return swap_connected(self.G, removed)
+        members = self.members[c]
+
+        def reachable(a, b):
+            found, piece = _bidirectional(self.G, a, b, members)
+            if found or self.bridge_ends.isdisjoint(piece):
+                return found
+            return bidirectional_reachable(self.G, a, b)
+
+        return _swap_connected(self.G, removed, reachable)
+
+
+class SwapWindow(object):
+    """Windowed connectivity check with a rollback log.
+
+    Instead of checking connectivity after every swap, a window of W
+    swaps is applied, connectivity is checked once, and the whole window
+    is undone if the check fails (Gkantsidis et al., Viger & Latapy).
+    W grows by one after a successful window and is halved after a
+    failed one, so it follows the recent success rate.
+
+    Parameters
+    ----------
+    G : graph
+        The graph being rewired. It must be connected.
+    window : int (default = 1)
+        Initial window size
+    edges : EdgeStore or list of them, optional
+        Edge stores kept in step with G when a window is rolled back
+
+    Examples
+    --------
+    >>> window = SwapWindow(G)
+    >>> # after applying a swap to G
+    >>> swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)])
+    """
+
+    def __init__(self, G, window=1, edges=None):
+        self.G = G
+        self.window = window
+        if edges is not None and not isinstance(edges, (list, tuple)):
+            edges = [edges]
+        self.edges = edges or []
+        self.n_checks = 0
+        self._log = []
+
+    def push(self, removed, added, flush=False):
+        """Record a swap that has been applied to G.
+
+        The window is checked when it is full or when flush is True.
+        Returns the number of swaps that were rolled back.
+        """
+        self._log.append((removed, added))
+        if flush or len(self._log) >= self.window:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """Check the pending swaps and roll them back if G got disconnected.
+
+        Returns the number of swaps that were rolled back.
+        """
+        if not self._log:
+            return 0
+        self.n_checks += 1
+        removed = [e for r, a in self._log for e in r]
+        if swap_connected(self.G, removed):
+            self._log = []
+            self.window += 1
+            return 0
+        n = len(self._log)
+        for r, a in reversed(self._log):
+            self.G.remove_edges_from(a)
+            self.G.add_edges_from(r)
+            for edges in self.edges:
+                edges.swap(a, r)
+        self._log = []
+        self.window = max(1, self.window // 2)
+        return n
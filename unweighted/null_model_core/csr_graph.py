@@ -0,0 +1,655 @@
+# -*- coding: utf-8 -*-
+"""
+Compact integer-indexed graph for the null models.
+
+A networkx graph keeps every edge in dicts of dicts plus an attribute dict,
+several hundred bytes per edge.  CSRGraph keeps int32 node ids in
+compressed sparse row form (indptr, indices) with a weight column, a few
+tens of bytes per edge, and a table that maps the ids back to the node
+labels.  Edges can be added and removed through a small overlay of
+adjacency sets that ``compact`` folds back into the arrays.
+
+The swap loops of random_1k, random_2k and the signed models run on a
+CSRGraph directly: ``G[i]`` is a view of the neighbours of node i backed
+by has_edge and neighbors, swaps go through add_edge and remove_edge,
+and the stubs are drawn from the arrays plus the overlay (``stubs``,
+``degree_buckets``).  The overlay only holds the edges moved since the
+last compaction, at most 1/16 of the entries, so the rewiring needs no
+per-edge Python objects.  The other models convert to networkx and
+back (``accept_csr``).
+"""
+
+import functools
+import inspect
+import random
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+
+from .edge_store import EdgeStore
+
+
+__all__ = ['CSRGraph',
+           'accept_csr']
+
+
+class CSRGraph(object):
+    """Graph in compressed sparse row form with int32 node ids.
+
+    Parameters
+    ----------
+    labels : list
+        Node labels, node i is labels[i]
+    indptr : array of length n + 1
+    indices : array
+        The neighbours (successors if directed) of node i are
+        ``indices[indptr[i]:indptr[i + 1]]``, sorted.  Undirected edges are
+        stored in both directions, self-loops once.
+    weights : array, optional
+        Weight of every entry of indices
+    directed : bool (default = False)
+    edge_data : list, optional
+        Attribute dict of every entry of indices, for attributes other than
+        the weight column
+    node_data : dict, optional
+        Attribute dicts of the nodes that have attributes, by node id
+    graph : dict, optional
+        Graph attributes
+
+    Notes
+    -----
+    Use ``from_networkx`` and ``to_networkx`` to convert; the conversion
+    keeps every node, edge and attribute.
+
+    Examples
+    --------
+    >>> C = CSRGraph.from_networkx(nx.path_graph(3))
+    >>> C.neighbors(1)
+    [0, 2]
+    >>> C.remove_edge(0, 1)
+    >>> sorted(C.to_networkx().edges())
+    [(1, 2)]
+    >>> 2 in C[1], list(C[1])
+    (True, [2])
+    """
+
+    def __init__(self, labels, indptr, indices, weights=None, directed=False,
+                 edge_data=None, node_data=None, graph=None, weight='weight'):
+        # a range of ids is kept as it is, e.g. for a graph in shared memory
+        self.labels = labels if isinstance(labels, range) else list(labels)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = None if weights is None else np.asarray(weights)
+        self.directed = directed
+        self.edge_data = edge_data
+        self.node_data = node_data or {}
+        self.graph = graph or {}
+        self.weight = weight
+        self._index = None
+        # overlay: added[i][j] = (weight, data), removed[i] = set of j,
+        # and the added entries (i, j) again for drawing them
+        self._added = {}
+        self._removed = {}
+        self._stubs = EdgeStore(directed=True)
+        self._views = None
+
+    @classmethod
+    def from_edges(cls, labels, src, dst, weights=None, directed=False,
+                   edge_data=None, **kwargs):
+        """Returns a CSRGraph with the edges src[k]-dst[k] (node ids)."""
+        n = len(labels)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        eid = np.arange(len(src))
+        if not directed:
+            keep = src != dst
+            src, dst = (np.concatenate((src, dst[keep])),
+                        np.concatenate((dst, src[keep])))
+            eid = np.concatenate((eid, eid[keep]))
+        order = np.argsort(src * n + dst, kind='stable')
+        src, dst, eid = src[order], dst[order], eid[order]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        if weights is not None:
+            weights = np.asarray(weights)[eid]
+        if edge_data is not None:
+            edge_data = [edge_data[k] for k in eid.tolist()]
+        return cls(labels, indptr, dst, weights, directed, edge_data,
+                   **kwargs)
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight', labels=None):
+        """Returns the CSRGraph of the networkx graph G.
+
+        The weight attribute goes to the weight column if every edge has
+        one, the other attributes to edge_data.  labels fixes the order of
+        the node ids; it must hold the nodes of G.
+        """
+        if labels is None or len(labels) != len(G):
+            labels = list(G)
+        index = dict((node, i) for i, node in enumerate(labels))
+        src = []
+        dst = []
+        data = []
+        for u, v, d in G.edges(data=True):
+            src.append(index[u])
+            dst.append(index[v])
+            data.append(dict(d))
+        weights = None
+        if data and all(weight in d for d in data):
+            weights = np.array([d[weight] for d in data])
+            data = [dict((k, x) for k, x in d.items() if k != weight)
+                    if len(d) > 1 else None for d in data]
+        if not any(data):
+            data = None
+        else:
+            data = [d or None for d in data]
+        node_data = dict((index[node], dict(d))
+                         for node, d in G.nodes(data=True) if d)
+        return cls.from_edges(labels, src, dst, weights, G.is_directed(),
+                              data, node_data=node_data,
+                              graph=dict(G.graph), weight=weight)
+
+    def to_networkx(self):
+        """Returns the graph as a networkx Graph or DiGraph."""
+        G = nx.DiGraph() if self.directed else nx.Graph()
+        G.graph.update(self.graph)
+        G.add_nodes_from((node, self.node_data.get(i, {}))
+                         for i, node in enumerate(self.labels))
+        src, dst, weights, edge_data = self.edge_arrays()
+        labels = self.labels
+        for k, (i, j) in enumerate(zip(src.tolist(), dst.tolist())):
+            d = {}
+            if edge_data is not None and edge_data[k]:
+                d.update(edge_data[k])
+            if weights is not None:
+                d[self.weight] = weights[k].item()
+            G.add_edge(labels[i], labels[j], **d)
+        return G
+
+    def update_from_networkx(self, G):
+        """Replace the contents of this graph by the networkx graph G,
+        keeping the order of the node ids."""
+        C = CSRGraph.from_networkx(G, self.weight, self.labels)
+        self.__dict__.update(C.__dict__)
+
+    def copy(self):
+        """Returns a copy; the arrays are copied, not the attribute dicts."""
+        self.compact()
+        C = CSRGraph(self.labels, self.indptr.copy(), self.indices.copy(),
+                     None if self.weights is None else self.weights.copy(),
+                     self.directed,
+                     None if self.edge_data is None else list(self.edge_data),
+                     dict(self.node_data), dict(self.graph), self.weight)
+        return C
+
+    @property
+    def index(self):
+        """dict mapping the node labels to their ids"""
+        if self._index is None:
+            self._index = dict((node, i) for i, node in enumerate(self.labels))
+        return self._index
+
+    def __len__(self):
+        return len(self.labels)
+
+    def is_directed(self):
+        return self.directed
+
+    def number_of_nodes(self):
+        return len(self.labels)
+
+    def number_of_edges(self):
+        self.compact()
+        if self.directed:
+            return len(self.indices)
+        n = len(self.labels)
+        loops = np.count_nonzero(
+            self.indices == np.repeat(np.arange(n), np.diff(self.indptr)))
+        return (len(self.indices) + loops) // 2
+
+    def degree(self):
+        """Returns the array of node degrees (out-degrees if directed)."""
+        deg = np.diff(self.indptr)
+        for i, removed in self._removed.items():
+            deg[i] -= len(removed)
+        for i, added in self._added.items():
+            deg[i] += len(added)
+        return deg
+
+    def neighbors(self, i):
+        """Returns the neighbours (successors if directed) of node id i."""
+        nbrs = self.indices[self.indptr[i]:self.indptr[i + 1]].tolist()
+        removed = self._removed.get(i)
+        if removed:
+            nbrs = [j for j in nbrs if j not in removed]
+        added = self._added.get(i)
+        if added:
+            nbrs.extend(added)
+        return nbrs
+
+    def has_edge(self, i, j):
+        """Returns True if the edge i-j (node ids) exists."""
+        if j in self._added.get(i, ()):
+            return True
+        if j in self._removed.get(i, ()):
+            return False
+        return self._find(i, j) >= 0
+
+    def __getitem__(self, i):
+        """Returns a view of the neighbours (successors if directed) of
+        node id i: ``j in G[i]``, ``len(G[i])``, iteration and
+        ``G[i][j]['weight']``, also for assignment, as in networkx."""
+        return _Neighbors(self, i)
+
+    @property
+    def adj(self):
+        """G.adj[i] is G[i], as in networkx"""
+        return self
+
+    def edge_weight(self, i, j):
+        """Returns the weight of the edge i-j (node ids).
+
+        Raises KeyError if the edge or its weight does not exist.
+        """
+        added = self._added.get(i)
+        if added and j in added:
+            if added[j][0] is None:
+                raise KeyError(self.weight)
+            return added[j][0]
+        k = self._entry(i, j)
+        if self.weights is None:
+            raise KeyError(self.weight)
+        return self.weights[k].item()
+
+    def set_edge_weight(self, i, j, weight):
+        """Set the weight of the edge i-j (node ids)."""
+        if self.directed or i == j:
+            ends = ((i, j),)
+        else:
+            ends = ((i, j), (j, i))
+        for a, b in ends:
+            added = self._added.get(a)
+            if added and b in added:
+                added[b] = (weight, added[b][1])
+                continue
+            k = self._entry(a, b)
+            if self.weights is None:
+                raise KeyError(self.weight)
+            if not self.weights.flags.writeable:
+                # e.g. attached to shared memory
+                self.weights = self.weights.copy()
+            self.weights[k] = weight
+
+    def edge_attr(self, i, j):
+        """Returns the attribute dict of the edge i-j (node ids) other than
+        the weight, None if it has none."""
+        added = self._added.get(i)
+        if added and j in added:
+            return added[j][1]
+        k = self._entry(i, j)
+        return None if self.edge_data is None else self.edge_data[k]
+
+    def choice(self):
+        """Returns a uniformly random edge (i, j) of node ids, like
+        EdgeStore.choice: for an undirected graph a uniform stub, as both
+        directions of an edge are stored.
+
+        An entry of the arrays that was removed is drawn again, so the
+        overlay is taken into account in O(1) expected time.
+        """
+        indptr, indices = self._scalar_views()
+        base = len(indices)
+        while True:
+            k = random.randrange(base + len(self._stubs))
+            if k >= base:
+                return self._stubs.choice()
+            i = bisect_right(indptr, k) - 1
+            j = indices[k]
+            removed = self._removed.get(i)
+            if not removed or j not in removed:
+                return i, j
+
+    def random_neighbor(self, i):
+        """Returns a uniformly random neighbour (successor if directed) of
+        node id i, without building the neighbour list."""
+        indptr, indices = self._scalar_views()
+        start = indptr[i]
+        d = indptr[i + 1] - start
+        removed = self._removed.get(i)
+        added = self._added.get(i)
+        if not removed and not added:
+            return indices[start + random.randrange(d)]
+        extra = len(added) if added else 0
+        while True:
+            r = random.randrange(d + extra)
+            if r >= d:
+                return next(islice(added, r - d, None))
+            j = indices[start + r]
+            if not removed or j not in removed:
+                return j
+
+    def stubs(self):
+        """Returns a view that draws the edges of this graph, for the swap
+        loops in place of an EdgeStore (see _Stubs)."""
+        return _Stubs(self)
+
+    def degree_buckets(self):
+        """Returns a view that draws the stubs by the degree of their end,
+        for the swap loops in place of a DegreeBuckets (see
+        _DegreeBuckets)."""
+        return _DegreeBuckets(self)
+
+    def is_connected(self):
+        """Returns True if the graph is connected, weakly if directed."""
+        self.compact()
+        n = len(self.labels)
+        if n == 0:
+            raise nx.NetworkXPointlessConcept(
+                "Connectivity is undefined for the null graph.")
+        indptr, indices = self.indptr, self.indices
+        if self.directed:
+            src = np.repeat(np.arange(n), np.diff(indptr))
+            C = CSRGraph.from_edges(range(n), src, indices, directed=False)
+            indptr, indices = C.indptr, C.indices
+        seen = np.zeros(n, dtype=bool)
+        seen[0] = True
+        front = np.zeros(1, dtype=np.int64)
+        while len(front):
+            # the entries of the rows of the frontier, level by level
+            starts = indptr[front]
+            counts = indptr[front + 1] - starts
+            ends = np.cumsum(counts)
+            entries = (np.repeat(starts - ends + counts, counts) +
+                       np.arange(ends[-1]))
+            front = indices[entries].astype(np.int64)
+            front = front[~seen[front]]
+            front.sort()
+            front = front[np.concatenate(([True], front[1:] != front[:-1]))
+                          ] if len(front) else front
+            seen[front] = True
+        return bool(seen.all())
+
+    def add_edge(self, i, j, weight=None, data=None):
+        """Add the edge i-j (node ids) to the overlay.
+
+        The edge must not exist yet.
+        """
+        self._added.setdefault(i, {})[j] = (weight, data)
+        self._stubs.add(i, j)
+        if not self.directed and i != j:
+            self._added.setdefault(j, {})[i] = (weight, data)
+            self._stubs.add(j, i)
+
+    def remove_edge(self, i, j):
+        """Remove the edge i-j (node ids).
+
+        Raises KeyError if the edge does not exist.
+        """
+        self._remove_entry(i, j)
+        if not self.directed and i != j:
+            self._remove_entry(j, i)
+
+    def compact(self):
+        """Fold the overlay into the arrays."""
+        if not self._added and not self._removed:
+            return
+        n = len(self.labels)
+        keep = np.ones(len(self.indices), dtype=bool)
+        keep[[self._find(i, j) for i, removed in self._removed.items()
+              for j in removed]] = False
+        add = [(i, j, w, d) for i, added in self._added.items()
+               for j, (w, d) in added.items()]
+        # int32 ids and one int64 sort key, the arrays are the bulk of the
+        # memory of the graph
+        src = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+        src = np.concatenate((src[keep],
+                              np.array([a[0] for a in add], np.int32)))
+        dst = np.concatenate((self.indices[keep],
+                              np.array([a[1] for a in add], np.int32)))
+        order = np.argsort(src.astype(np.int64) * n + dst, kind='stable')
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        del src
+        weights = self.weights
+        if weights is not None:
+            weights = np.concatenate(
+                (weights[keep], np.array([a[2] for a in add], weights.dtype))
+            )[order]
+        edge_data = self.edge_data
+        if edge_data is not None or any(a[3] for a in add):
+            if edge_data is None:
+                edge_data = [None] * len(keep)
+            edge_data = ([d for d, k in zip(edge_data, keep) if k] +
+                         [a[3] for a in add])
+            edge_data = [edge_data[k] for k in order.tolist()]
+        self.indptr, self.indices = indptr, dst[order]
+        self.weights, self.edge_data = weights, edge_data
+        self._added = {}
+        self._removed = {}
+        self._stubs = EdgeStore(directed=True)
+
+    def edge_arrays(self):
+        """Returns src, dst, weights and edge_data with every edge once.
+
+        weights and edge_data are None if the graph has none.
+        """
+        self.compact()
+        n = len(self.labels)
+        src = np.repeat(np.arange(n), np.diff(self.indptr))
+        dst = self.indices.astype(np.int64)
+        weights, edge_data = self.weights, self.edge_data
+        if self.directed:
+            return src, dst, weights, edge_data
+        once = src <= dst
+        if weights is not None:
+            weights = weights[once]
+        if edge_data is not None:
+            edge_data = [d for d, k in zip(edge_data, once.tolist()) if k]
+        return src[once], dst[once], weights, edge_data
+
+    def set_edges(self, src, dst, weights=None, edge_data=None):
+        """Replace the edges by src[k]-dst[k] (node ids), each edge once."""
+        C = CSRGraph.from_edges(self.labels, src, dst, weights, self.directed,
+                                edge_data)
+        self.indptr, self.indices = C.indptr, C.indices
+        self.weights, self.edge_data = C.weights, C.edge_data
+        self._added = {}
+        self._removed = {}
+        self._stubs = EdgeStore(directed=True)
+
+    def _scalar_views(self):
+        # memoryviews of indptr and indices, whose items are Python ints;
+        # they are much faster than the arrays for one item at a time
+        views = self._views
+        if (views is None or views[0] is not self.indptr or
+                views[1] is not self.indices):
+            views = self._views = (self.indptr, self.indices,
+                                   memoryview(self.indptr),
+                                   memoryview(self.indices))
+        return views[2], views[3]
+
+    def _find(self, i, j):
+        indptr, indices = self._scalar_views()
+        start, end = indptr[i], indptr[i + 1]
+        k = bisect_left(indices, j, start, end)
+        if k < end and indices[k] == j:
+            return k
+        return -1
+
+    def _entry(self, i, j):
+        # the position of the edge i-j in the arrays, KeyError if it is
+        # not there or removed
+        k = self._find(i, j)
+        if k < 0 or j in self._removed.get(i, ()):
+            raise KeyError((i, j))
+        return k
+
+    def _remove_entry(self, i, j):
+        added = self._added.get(i)
+        if added and j in added:
+            del added[j]
+            self._stubs.remove(i, j)
+            return
+        self._entry(i, j)
+        self._removed.setdefault(i, set()).add(j)
+
+
+class _Neighbors(object):
+    # the neighbours of node id i, see CSRGraph.__getitem__
+
+    __slots__ = ('graph', 'i')
+
+    def __init__(self, graph, i):
+        self.graph = graph
+        self.i = i
+
+    def __contains__(self, j):
+        return self.graph.has_edge(self.i, j)
+
+    def __iter__(self):
+        return iter(self.graph.neighbors(self.i))
+
+    def __len__(self):
+        graph, i = self.graph, self.i
+        return (int(graph.indptr[i + 1] - graph.indptr[i]) -
+                len(graph._removed.get(i, ())) + len(graph._added.get(i, ())))
+
+    def __getitem__(self, j):
+        if not self.graph.has_edge(self.i, j):
+            raise KeyError(j)
+        return _EdgeAttr(self.graph, self.i, j)
+
+
+class _EdgeAttr(object):
+    # the attributes of the edge i-j, the weight column included
+
+    __slots__ = ('graph', 'i', 'j')
+
+    def __init__(self, graph, i, j):
+        self.graph = graph
+        self.i = i
+        self.j = j
+
+    def __getitem__(self, key):
+        if key == self.graph.weight:
+            return self.graph.edge_weight(self.i, self.j)
+        data = self.graph.edge_attr(self.i, self.j)
+        if data is None:
+            raise KeyError(key)
+        return data[key]
+
+    def __setitem__(self, key, value):
+        if key != self.graph.weight:
+            raise KeyError(key)
+        self.graph.set_edge_weight(self.i, self.j, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class _Stubs(object):
+    # the edges of a CSRGraph, drawn by CSRGraph.choice.  The swap loops
+    # edit the graph with add_edge and remove_edge, so swap has nothing to
+    # move; it folds the overlay into the arrays once it holds 1/16
+    # of the entries, which keeps it small at O(m log m) per compaction.
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return self.graph.number_of_edges()
+
+    def choice(self):
+        return self.graph.choice()
+
+    def swap(self, removed, added):
+        graph = self.graph
+        if len(graph._stubs) > max(4096, len(graph.indices) // 16):
+            graph.compact()
+
+
+class _DegreeBuckets(object):
+    # DegreeBuckets of a CSRGraph: a stub (x, y) with y of degree k is a
+    # node y drawn from the nodes of degree k and a random neighbour x, as
+    # they all have k stubs.  Swaps keep the degrees, so the classes are
+    # fixed and swap has nothing to do.
+
+    def __init__(self, graph):
+        self.graph = graph
+        degree = graph.degree()
+        self.degree = degree.tolist()
+        order = np.argsort(degree, kind='stable')
+        bounds = np.flatnonzero(np.diff(degree[order])) + 1
+        self._classes = dict((int(degree[nodes[0]]), nodes)
+                             for nodes in np.split(order, bounds)
+                             if len(nodes))
+
+    def __len__(self):
+        return len(self._classes)
+
+    def size(self, k):
+        nodes = self._classes.get(k)
+        return 0 if nodes is None else k * len(nodes)
+
+    def choice(self, k):
+        nodes = self._classes[k]
+        y = int(nodes[random.randrange(len(nodes))])
+        return self.graph.random_neighbor(y), y
+
+    def swap(self, removed, added):
+        pass
+
+
+def accept_csr(func=None, native=None):
+    """Lets a null model take a CSRGraph wherever it takes a networkx graph.
+
+    A CSRGraph first argument is converted to networkx on the way in.  If
+    the model returns the graph it was given, i.e. rewired it in place, the
+    CSRGraph is updated in place and returned; another returned graph is
+    converted to a new CSRGraph.
+
+    native(arguments), with arguments a dict of every argument of the call
+    (defaults included), may return True when the model handles the
+    CSRGraph itself, e.g. in block mode.
+
+    The networkx graph is a private copy already, so a model called with
+    inplace=False rewires it in place and a new CSRGraph is returned.
+
+    Examples
+    --------
+    >>> @accept_csr(native=lambda a: a['block_size'])
+    ... def random_1k(G, n_swap=1, max_tries=100, block_size=None):
+    ...     pass
+    """
+    if func is None:
+        return functools.partial(accept_csr, native=native)
+    signature = inspect.signature(func)
+    first = next(iter(signature.parameters))
+
+    @functools.wraps(func)
+    def wrapper(G, *args, **kwargs):
+        if not isinstance(G, CSRGraph):
+            return func(G, *args, **kwargs)
+        bound = signature.bind(G, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if native is not None and native(arguments):
+            return func(G, *args, **kwargs)
+        inplace = arguments.get('inplace', True)
+        arguments[first] = H0 = G.to_networkx()
+        if not inplace:
+            arguments['inplace'] = True
+        H = func(*bound.args, **bound.kwargs)
+        if H is H0 and inplace:
+            G.update_from_networkx(H)
+            return G
+        if isinstance(H, nx.Graph):
+            return CSRGraph.from_networkx(H, G.weight, G.labels)
+        return H
+    return wrapper
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Double-edge swaps for directed graphs on integer edge arrays.
+
+random_1kd drew its two edges with random.sample(G.edges(), 2) and looked
+the new edges up in G.edges(), two O(m) list operations per try.  Here
+the out-nodes and in-nodes of the edges sit in two arrays and every edge
+has a packed 64-bit key ``src * n + dst`` in a hash map (see EdgeArrays),
+so drawing a pair of edges and checking the new ones is O(1).
+"""
+
+import random
+
+import networkx as nx
+
+from .block_swap import EdgeArrays, _move_edges, _write_back
+from .connectivity import swap_connected
+from .csr_graph import CSRGraph
+
+
+__all__ = ['directed_swap']
+
+
+def directed_swap(G, n_swap, max_tries, connected=0):
+    """Swaps u->v, x->y for u->y, x->v in the directed graph G, in place.
+
+    Parameters
+    ----------
+    G : directed graph or CSRGraph
+    n_swap : int
+        Number of swaps to perform
+    max_tries : int
+        Maximum number of attempts to swap edges
+    connected : int (default = 0)
+        keep the weak connectivity of the graph or not.
+        1 : keep,    0 : not keep
+
+    Returns
+    -------
+    G : graph
+
+    Notes
+    -----
+    Every try draws two distinct edges uniformly; it fails if u, v, x, y
+    are not four different nodes or if u->y or x->v exists.  The in- and
+    out-degree of every node is kept, and the new edges take the
+    attributes of u->v and x->y.  Unless connectivity is checked, G is
+    only updated once at the end.
+    """
+    if not G.is_directed():
+        raise nx.NetworkXError("For directed graphs only.")
+    csr = isinstance(G, CSRGraph)
+    if csr and connected:
+        raise nx.NetworkXError("connected swaps need a networkx graph.")
+    edges = EdgeArrays(G)
+    nodes = edges.nodes
+    n = edges.n
+    m = len(edges)
+    if m < 2:
+        raise nx.NetworkXError("Graph has less than two edges.")
+    src, dst = edges.src, edges.dst
+    src0, dst0 = edges.src_array.copy(), edges.dst_array.copy()
+
+    n_try = 0
+    swapcount = 0
+    while swapcount < n_swap and n_try < max_tries:
+        n_try += 1
+        i = random.randrange(m)
+        j = random.randrange(m - 1)
+        if j >= i:
+            j += 1
+        u, v, x, y = src[i], dst[i], src[j], dst[j]
+        if len(set([u, v, x, y])) < 4:
+            continue
+        if u * n + y in edges or x * n + v in edges:
+            continue
+        edges.replace(i, u, y)
+        edges.replace(j, x, v)
+        if connected:
+            removed = [(nodes[u], nodes[v]), (nodes[x], nodes[y])]
+            added = [(nodes[u], nodes[y]), (nodes[x], nodes[v])]
+            _move_edges(G, removed, added)
+            if not swap_connected(G, removed):
+                _move_edges(G, added, removed)
+                edges.replace(i, u, v)
+                edges.replace(j, x, y)
+                continue
+        swapcount += 1
+
+    if not connected:
+        _write_back(G, edges, src0, dst0)
+    if swapcount < n_swap:
+        print('Maximum number of swap attempts (%s) exceeded ' %
+              n_try + 'before desired swaps achieved (%s).' % n_swap)
+    return G
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Edge containers shared by the swap-based null models.
+
+The swap loops used to keep ``edges = G.edges()`` as a plain list and call
+``edges.remove(...)`` and ``(x, y) not in edges`` on every try, which costs
+O(m) each time.  ``EdgeStore`` keeps the edges in an array together with a
+position map, so removal, uniform sampling and membership tests are O(1).
+"""
+
+import random
+
+
+__all__ = ['EdgeStore',
+           'DegreeBuckets']
+
+
+class EdgeStore(object):
+    """Edge array plus position map.
+
+    Parameters
+    ----------
+    edges : iterable of (u, v) pairs, optional
+        Initial edges.
+    directed : bool (default = False)
+        If False, ``(u, v)`` and ``(v, u)`` are the same edge.
+
+    Notes
+    -----
+    Removal swaps the last edge into the freed slot, so the order of the
+    stored edges is not preserved.
+
+    Examples
+    --------
+    >>> edges = EdgeStore([(1, 2), (2, 3)])
+    >>> (3, 2) in edges
+    True
+    >>> edges.replace((1, 2), (1, 3))
+    >>> sorted(edges)
+    [(1, 3), (2, 3)]
+    """
+
+    def __init__(self, edges=(), directed=False):
+        self.directed = directed
+        self._edges = []
+        self._pos = {}
+        for u, v in edges:
+            self.add(u, v)
+
+    @classmethod
+    def of(cls, G):
+        """Returns an EdgeStore of the edges of G; for a CSRGraph the view
+        of its stubs (CSRGraph.stubs), which draws from the arrays and
+        follows the edits of the graph instead of copying its edges."""
+        if hasattr(G, 'stubs'):
+            return G.stubs()
+        return cls(G.edges(), directed=G.is_directed())
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __iter__(self):
+        return iter(self._edges)
+
+    def __contains__(self, edge):
+        return edge in self._pos
+
+    def edges(self):
+        """Returns a list copy of the stored edges."""
+        return list(self._edges)
+
+    def add(self, u, v):
+        """Add the edge u-v, ignoring it if it is already stored."""
+        if (u, v) in self._pos:
+            return
+        self._set(len(self._edges), u, v)
+        self._edges.append((u, v))
+
+    def remove(self, u, v):
+        """Remove the edge u-v in O(1) by moving the last edge into its slot.
+
+        Raises KeyError if the edge is not stored.
+        """
+        i = self._pos.pop((u, v))
+        if not self.directed:
+            del self._pos[(v, u)]
+        last = self._edges.pop()
+        if i < len(self._edges):
+            self._edges[i] = last
+            self._set(i, last[0], last[1])
+
+    def replace(self, old, new):
+        """Replace the edge old by the edge new, keeping its slot."""
+        i = self._pos.pop(old)
+        if not self.directed:
+            del self._pos[(old[1], old[0])]
+        self._edges[i] = new
+        self._set(i, new[0], new[1])
+
+    def swap(self, removed, added):
+        """Replace removed[i] by added[i] for every i, e.g. after a double-edge
+        swap ``edges.swap([(u, v), (x, y)], [(u, y), (x, v)])``."""
+        for old, new in zip(removed, added):
+            self.replace(old, new)
+
+    def choice(self):
+        """Returns a uniformly random edge.
+
+        For undirected stores the orientation is random as well, i.e. a
+        uniform stub (edge endpoint) u and its partner v.  This is the same
+        as a degree-weighted node u and a uniform neighbour v, without
+        building the neighbour list of u.
+        """
+        if self.directed:
+            return self._edges[random.randrange(len(self._edges))]
+        i = random.randrange(2 * len(self._edges))
+        u, v = self._edges[i >> 1]
+        if i & 1:
+            return v, u
+        return u, v
+
+    def sample_pair(self):
+        """Returns two distinct edges chosen uniformly at random."""
+        i, j = random.sample(range(len(self._edges)), 2)
+        return self._edges[i], self._edges[j]
+
+    def _set(self, i, u, v):
+        self._pos[(u, v)] = i
+        if not self.directed:
+            self._pos[(v, u)] = i
+
+
+class DegreeBuckets(object):
+    """Stubs of an undirected graph grouped by the degree of their end.
+
+    Bucket k holds every oriented edge (u, v) whose end v has degree k,
+    so ``choice(k)`` draws the second edge of a joint-degree preserving
+    swap directly instead of drawing any edge and rejecting it.
+
+    Parameters
+    ----------
+    G : undirected graph
+    degree : dict, optional
+        The degree of every node of G to bucket by, by default the degrees
+        in G (e.g. the degrees in the whole graph for a subgraph G)
+    key : function, optional
+        Also bucket the stubs (u, v) by key(u, v), bucket (key(u, v), k)
+        then holds the stubs of that key whose end has degree k (e.g.
+        CommunityEdges.stub_key)
+
+    Notes
+    -----
+    The degrees and keys are taken once, swaps must keep them.
+
+    Examples
+    --------
+    >>> buckets = DegreeBuckets(G)
+    >>> u, v = edges.choice()
+    >>> x, y = buckets.choice(buckets.degree[v])  # deg(y) == deg(v)
+    """
+
+    def __init__(self, G, degree=None, key=None):
+        self.degree = dict(G.degree()) if degree is None else degree
+        self.key = key
+        self._buckets = {}
+        for u, v in G.edges():
+            self._add(u, v)
+
+    @classmethod
+    def of(cls, G):
+        """Returns the DegreeBuckets of G; for a CSRGraph a view that draws
+        from its arrays (CSRGraph.degree_buckets)."""
+        if hasattr(G, 'degree_buckets'):
+            return G.degree_buckets()
+        return cls(G)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def size(self, k):
+        """Returns the number of stubs whose end has degree k."""
+        bucket = self._buckets.get(k)
+        return len(bucket) if bucket is not None else 0
+
+    def bucket(self, u, v):
+        """Returns the bucket of the stub (u, v): the degree of v, with the
+        key of (u, v) if keyed."""
+        if self.key is None:
+            return self.degree[v]
+        return self.key(u, v), self.degree[v]
+
+    def choice(self, k):
+        """Returns a uniformly random stub (x, y) of bucket k, i.e. with y
+        of degree k if not keyed."""
+        return self._buckets[k].choice()
+
+    def swap(self, removed, added):
+        """Replace the edges removed by the edges added, e.g. after a
+        double-edge swap ``buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])``."""
+        for u, v in removed:
+            self._buckets[self.bucket(u, v)].remove(u, v)
+            if u != v:
+                self._buckets[self.bucket(v, u)].remove(v, u)
+        for u, v in added:
+            self._add(u, v)
+
+    def _add(self, u, v):
+        for a, b in ((u, v), (v, u)):
+            k = self.bucket(a, b)
+            bucket = self._buckets.get(k)
+            if bucket is None:
+                bucket = self._buckets[k] = EdgeStore(directed=True)
+            bucket.add(a, b)
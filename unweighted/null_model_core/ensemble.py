@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Ensembles of null-model samples generated in parallel.
+
+A significance test needs hundreds of independent samples of a null model,
+and the test scripts drew them one at a time in a serial loop.
+generate_ensemble runs the chains in a process pool, each chain seeded
+from its own child of a SeedSequence, so the ensemble only depends on the
+seed and not on the number of workers or the order the chains finish in.
+"""
+
+import inspect
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+from .shared_graph import SharedGraph
+
+
+__all__ = ['generate_ensemble']
+
+
+# state of a worker process, set once by _init_worker
+_worker = {}
+
+
+def _call_args(model_fn, n_swap, max_tries, kwargs):
+    # the models call their swap count n_swap or nswap, and some have
+    # no swap count or max_tries at all
+    params = inspect.signature(model_fn).parameters
+    kwargs = dict(kwargs)
+    for name in ('n_swap', 'nswap'):
+        if name in params:
+            kwargs.setdefault(name, n_swap)
+    if 'max_tries' in params:
+        kwargs.setdefault('max_tries', max_tries)
+    if 'inplace' in params:
+        # every chain must start from the original graph
+        kwargs['inplace'] = False
+    return kwargs
+
+
+def _sample(model_fn, G, seed, args, kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    return model_fn(G, *args, **kwargs)
+
+
+def _state(model_fn, G, args, kwargs, to_networkx):
+    if isinstance(G, SharedGraph):
+        G = G.attach()
+    return dict(model_fn=model_fn, G=G, args=args, kwargs=kwargs,
+                to_networkx=to_networkx)
+
+
+def _run(state, task):
+    i, seed = task
+    G, kwargs = state['G'], state['kwargs']
+    if state['to_networkx']:
+        # a networkx graph was given: rebuild it from the CSR arrays, the
+        # new graph is the copy the chain may rewire
+        G = G.to_networkx()
+        if 'inplace' in kwargs:
+            kwargs = dict(kwargs, inplace=True)
+    return i, _sample(state['model_fn'], G, seed, state['args'], kwargs)
+
+
+def _init_worker(*state):
+    _worker.update(_state(*state))
+
+
+def _run_worker(task):
+    return _run(_worker, task)
+
+
+def generate_ensemble(model_fn, G, n_samples, n_swap=1, max_tries=100,
+                      workers=None, seed=None, stream=False, args=(),
+                      shared=True, **kwargs):
+    """Returns n_samples independent samples of a null model of G.
+
+    Parameters
+    ----------
+    model_fn : function
+        Any null model of the unweighted, weighted or signed modules, called
+        as ``model_fn(G, *args, n_swap=n_swap, max_tries=max_tries,
+        **kwargs)``; n_swap and max_tries are only passed if model_fn takes
+        them (as n_swap or nswap)
+    G : graph or CSRGraph
+        The original graph, it is not changed
+    n_samples : int
+        Number of samples
+    n_swap : int (default = 1)
+        Number of swaps of each chain
+    max_tries : int (default = 100)
+        Maximum number of attempts of each chain
+    workers : int, optional
+        Number of worker processes, by default one per CPU.  With 1 the
+        chains run one after another in this process.
+    seed : int, optional
+        Seed of the ensemble.  Chain i seeds random and numpy.random from
+        the i-th child of ``numpy.random.SeedSequence(seed)``.
+    stream : bool (default = False)
+        If True, return an iterator of (i, sample) pairs in the order the
+        chains finish instead of the list of samples
+    args : tuple, optional
+        Extra positional arguments of model_fn after G, e.g. k of
+        rich_club_create or node_community of the community models
+    shared : bool (default = True)
+        Publish the arrays of G once in shared memory (see SharedGraph)
+        instead of pickling G for every worker
+    kwargs :
+        Extra keyword arguments of model_fn, e.g. connected=0
+
+    Returns
+    -------
+    samples : list, or iterator of (i, sample) if stream is True
+
+    Notes
+    -----
+    Sample i is the same whatever the number of workers.  model_fn is
+    sent to each worker once, so it must be picklable, i.e. a function
+    defined at the top level of a module.  With shared=True a worker
+    attaches to G in O(1) and each chain starts from its own networkx copy
+    (or CSRGraph copy, for a CSRGraph G) of the shared arrays.
+
+    Examples
+    --------
+    >>> samples = generate_ensemble(random_1k, G, 1000, n_swap=10 * m,
+    ...                             max_tries=100 * m, seed=1, connected=0)
+    """
+    kwargs = _call_args(model_fn, n_swap, max_tries, kwargs)
+    args = tuple(args)
+    seeds = [int(s.generate_state(1)[0])
+             for s in np.random.SeedSequence(seed).spawn(n_samples)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, n_samples)
+    to_networkx = shared and not isinstance(G, CSRGraph)
+    if workers <= 1:
+        # the chains start from the same graph as in the workers, the edge
+        # order of the CSR arrays decides which edges the draws pick
+        state = _state(model_fn, CSRGraph.from_networkx(G) if to_networkx
+                       else G, args, kwargs, to_networkx)
+        pairs = (_run(state, task) for task in enumerate(seeds))
+        return pairs if stream else [sample for i, sample in pairs]
+    pairs = _pool_samples(model_fn, G, seeds, args, kwargs, workers, shared,
+                          to_networkx)
+    if stream:
+        return pairs
+    samples = [None] * n_samples
+    for i, sample in pairs:
+        samples[i] = sample
+    return samples
+
+
+def _pool_samples(model_fn, G, seeds, args, kwargs, workers, shared,
+                  to_networkx):
+    handle = None
+    if shared:
+        G = handle = SharedGraph(G)
+    initargs = (model_fn, G, args, kwargs, to_networkx)
+    pool = multiprocessing.Pool(workers, _init_worker, initargs)
+    try:
+        for pair in pool.imap_unordered(_run_worker, enumerate(seeds)):
+            yield pair
+    finally:
+        pool.terminate()
+        pool.join()
+        if handle is not None:
+            handle.close()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental modularity for the community-strengthening null models.
+
+The modularity of a partition is Q = sum_c [L_c / m - (d_c / 2m)^2], with
+L_c the number of edges inside community c and d_c the sum of the degrees
+of its nodes.  A double-edge swap keeps every degree, hence every d_c, so
+only the L_c of the communities of the four edges change and Q is known
+after every swap in O(1).
+"""
+
+from collections import defaultdict
+
+from .community_index import CommunityIndex
+
+
+__all__ = ['ModularityTracker']
+
+
+class ModularityTracker(object):
+    """Modularity of a graph and communities under double-edge swaps.
+
+    Parameters
+    ----------
+    G : undirected graph
+        The graph being rewired; swaps must keep the degree of every node
+    communities : list of lists of nodes, or CommunityIndex
+
+    Attributes
+    ----------
+    internal : dict
+        L_c, the number of edges inside community c
+    degree_sum : dict
+        d_c, the sum of the degrees of the nodes of community c
+
+    Notes
+    -----
+    In overlapping communities an edge counts for every community of both
+    its ends, and a node for every community it is in.
+
+    Examples
+    --------
+    >>> modularity = ModularityTracker(G, node_community)
+    >>> modularity.swap([(u, v), (x, y)], [(u, y), (v, x)])
+    >>> modularity.q()
+    """
+
+    def __init__(self, G, communities):
+        if not isinstance(communities, CommunityIndex):
+            communities = CommunityIndex(communities)
+        self.communities = communities
+        self.m = G.number_of_edges()
+        self.internal = defaultdict(int)
+        self.degree_sum = defaultdict(int)
+        for node, d in dict(G.degree()).items():
+            for c in self._of(node):
+                self.degree_sum[c] += d
+        self.n_internal = 0
+        for u, v in G.edges():
+            self._count(u, v, 1)
+        two_m = 2.0 * self.m
+        self._expected = sum((d / two_m) ** 2
+                             for d in self.degree_sum.values()) if self.m else 0.0
+
+    def _of(self, node):
+        # the communities of node
+        if not self.communities.overlapping:
+            c = self.communities.label.get(node)
+            return () if c is None else (c,)
+        b = self.communities.mask.get(node, 0)
+        return [i for i in range(b.bit_length()) if b >> i & 1]
+
+    def _count(self, u, v, sign):
+        for c in self._of(u):
+            if c in self._of(v):
+                self.internal[c] += sign
+                self.n_internal += sign
+
+    def swap(self, removed, added):
+        """Count the edges removed out and the edges added in, and return
+        the change of Q."""
+        before = self.n_internal
+        for u, v in removed:
+            self._count(u, v, -1)
+        for u, v in added:
+            self._count(u, v, 1)
+        return (self.n_internal - before) / float(self.m)
+
+    def q(self):
+        """Returns the modularity Q."""
+        if not self.m:
+            return 0.0
+        return self.n_internal / float(self.m) - self._expected
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Graphs published once in shared memory for worker processes.
+
+A process pool pickles its arguments, so every worker used to receive its
+own copy of the networkx graph: seconds of serialization on large inputs
+and one more full copy of the graph in memory per worker.  SharedGraph
+puts the CSR arrays of the graph (indptr, indices and the weight column,
+which also holds the signs of a signed network) in shared memory blocks.
+The handle that is pickled only holds their names, and a worker attaches
+to them read-only, without copying.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .csr_graph import CSRGraph
+
+
+__all__ = ['SharedGraph']
+
+
+def _attach(name):
+    # the owner unlinks the block, so keep it out of the resource tracker
+    # where possible (Python >= 3.13); pool workers share the tracker of
+    # their parent, for which a second registration is harmless
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedGraph(object):
+    """Handle of a graph whose CSR arrays are in shared memory.
+
+    Parameters
+    ----------
+    G : graph or CSRGraph
+        The graph to publish, it is converted to a CSRGraph first
+
+    Notes
+    -----
+    The process that creates the handle owns the blocks and must call
+    ``close`` (or use the handle as a context manager) when the workers
+    are done.  The handle is small when pickled: node labels 0..n-1 are
+    not stored at all, other labels and the attribute dicts besides the
+    weight, if any, travel with the handle.
+
+    Examples
+    --------
+    >>> with SharedGraph(G) as shared:
+    ...     pool = multiprocessing.Pool(4, init, (shared,))
+    >>> # in a worker
+    >>> C = shared.attach()  # read-only CSRGraph, O(1)
+    """
+
+    _arrays = ('indptr', 'indices', 'weights')
+
+    def __init__(self, G):
+        if not isinstance(G, CSRGraph):
+            G = CSRGraph.from_networkx(G)
+        G.compact()
+        n = len(G.labels)
+        if isinstance(G.labels, range) or G.labels == list(range(n)):
+            self.labels = range(n)
+        else:
+            self.labels = G.labels
+        self.directed = G.directed
+        self.edge_data = G.edge_data
+        self.node_data = G.node_data
+        self.graph = G.graph
+        self.weight = G.weight
+        self.blocks = {}
+        self._owned = []
+        self._attached = []
+        for name in self._arrays:
+            a = getattr(G, name)
+            if a is None:
+                continue
+            shm = shared_memory.SharedMemory(create=True,
+                                             size=max(a.nbytes, 1))
+            np.ndarray(a.shape, a.dtype, buffer=shm.buf)[:] = a
+            self._owned.append(shm)
+            self.blocks[name] = (shm.name, a.dtype.str, a.shape)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_owned'] = []
+        state['_attached'] = []
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def attach(self):
+        """Returns a CSRGraph on the shared arrays.
+
+        The arrays are read-only; the CSRGraph methods that change edges
+        replace them with new arrays, so only what is changed is copied.
+        """
+        arrays = {}
+        for name, (shm_name, dtype, shape) in self.blocks.items():
+            shm = _attach(shm_name)
+            # the views need the block to stay open
+            self._attached.append(shm)
+            a = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+            a.flags.writeable = False
+            arrays[name] = a
+        return CSRGraph(self.labels, arrays['indptr'], arrays['indices'],
+                        arrays.get('weights'), self.directed, self.edge_data,
+                        self.node_data, self.graph, self.weight)
+
+    def close(self):
+        """Detach from the blocks, and free them in the owning process.
+
+        The CSRGraphs returned by attach must not be used afterwards.
+        """
+        for shm in self._attached:
+            shm.close()
+        for shm in self._owned:
+            shm.close()
+            shm.unlink()
+        self._attached = []
+        self._owned = []
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Rich-club coefficients for every degree threshold at once.
+
+Comparing the rich club of a graph with its null models meant one call of
+rich_club_create/rich_club_break, or one recount of the hubs and of the
+edges between them, per threshold k.  A node is a hub for every k below
+its degree and an edge is a hub edge for every k below the smaller degree
+of its ends, so after one sort of the node degrees and of these edge
+degrees the counts for all thresholds follow from binary searches.
+"""
+
+import numpy as np
+
+from null_model_core.csr_graph import CSRGraph
+from null_model_core.ensemble import generate_ensemble
+from unweight_null_model import random_1k
+
+
+__all__ = ['rich_club_curve',
+           'rich_club_sweep']
+
+
+def _degrees_and_edges(G):
+    # degree of every node and the two ends of every edge, as node ids
+    if isinstance(G, CSRGraph):
+        src, dst = G.edge_arrays()[:2]
+        return G.degree(), src, dst
+    index = dict((node, i) for i, node in enumerate(G))
+    degree = np.array([G.degree(node) for node in G], dtype=np.int64)
+    src, dst = zip(*G.edges()) if G.number_of_edges() else ((), ())
+    src = np.array([index[u] for u in src], dtype=np.int64)
+    dst = np.array([index[v] for v in dst], dtype=np.int64)
+    return degree, src, dst
+
+
+def rich_club_curve(G, ks=None):
+    """Returns the rich-club coefficient of G for every degree threshold.
+
+    Parameters
+    ----------
+    G : undirected graph or CSRGraph
+    ks : array of int, optional
+        The thresholds, by default 0 to the largest degree - 1
+
+    Returns
+    -------
+    ks : array of int
+    phi : array of float
+        phi[i] = 2 E_k / (N_k (N_k - 1)) for k = ks[i], with N_k the number
+        of nodes of degree > k and E_k the number of edges between them;
+        nan if N_k < 2
+
+    Notes
+    -----
+    O(n log n + m log m) for all the thresholds together.
+    """
+    degree, src, dst = _degrees_and_edges(G)
+    if ks is None:
+        ks = np.arange(max(degree.max() if len(degree) else 0, 1))
+    ks = np.asarray(ks, dtype=np.int64)
+    # an edge is between hubs iff its smaller end degree is > k
+    edge_degree = np.sort(np.minimum(degree[src], degree[dst]))
+    n_k = len(degree) - np.searchsorted(np.sort(degree), ks, side='right')
+    e_k = len(edge_degree) - np.searchsorted(edge_degree, ks, side='right')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phi = np.where(n_k > 1, 2.0 * e_k / (n_k * (n_k - 1.0)), np.nan)
+    return ks, phi
+
+
+def rich_club_sweep(G, n_samples=10, model_fn=random_1k, n_swap=None,
+                    max_tries=None, workers=None, seed=None, **kwargs):
+    """Returns the rich-club curve of G, of n_samples null models of G, and
+    their ratio.
+
+    Parameters
+    ----------
+    G : undirected graph or CSRGraph
+    n_samples : int (default = 10)
+        Number of null samples
+    model_fn : function (default = random_1k)
+        The null model, see generate_ensemble
+    n_swap : int, optional
+        Number of swaps of each sample, by default 10 m
+    max_tries : int, optional
+        Maximum number of attempts of each sample, by default 100 m
+    workers : int, optional
+        Number of worker processes, see generate_ensemble
+    seed : int, optional
+        Seed of the ensemble
+    kwargs :
+        Extra keyword arguments of model_fn, by default connected=0
+
+    Returns
+    -------
+    ks : array of int
+        The degree thresholds, 0 to the largest degree of G - 1
+    phi : array of float
+        Rich-club coefficients of G
+    phi_null : array of float, shape (n_samples, len(ks))
+        Rich-club coefficients of the null samples
+    ratio : array of float
+        phi / phi_null.mean(axis=0), the normalized rich-club coefficient
+
+    Notes
+    -----
+    One sort per graph gives the whole curve (see rich_club_curve), so
+    the sweep costs O(m log m) for G plus the cost of the samples, instead
+    of one model run and one recount per threshold.
+
+    Examples
+    --------
+    >>> ks, phi, phi_null, ratio = rich_club_sweep(G, 100, block_size=1024,
+    ...                                            seed=1)
+    """
+    m = G.number_of_edges()
+    if n_swap is None:
+        n_swap = 10 * m
+    if max_tries is None:
+        max_tries = 100 * m
+    kwargs.setdefault('connected', 0)
+    ks, phi = rich_club_curve(G)
+    samples = generate_ensemble(model_fn, G, n_samples, n_swap, max_tries,
+                                workers=workers, seed=seed, stream=True,
+                                **kwargs)
+    phi_null = np.empty((n_samples, len(ks)))
+    for i, H in samples:
+        phi_null[i] = rich_club_curve(H, ks)[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = phi / phi_null.mean(axis=0)
+    return ks, phi, phi_null, ratio
@@ -6,14 +6,24 @@ revised on Oct 15 2017
 """
 
 import networkx as nx
+import numpy as np
 import random
-import copy
+
+from null_model_core.assortativity import AssortativityTracker
+from null_model_core.block_swap import block_swap
+from null_model_core.connectivity import swap_connected, SwapWindow
+from null_model_core.clone import clone_graph
+from null_model_core.csr_graph import CSRGraph, accept_csr
+from null_model_core.directed_swap import directed_swap
+from null_model_core.edge_store import DegreeBuckets, EdgeStore
+from null_model_core.triangles import TriangleCounts
 
 
 __all__ = ['judge_error',
            'count_degree_nodes',
            'er_graph',
            'config_model',
+           'joint_degree_model',
            'random_0k',
            'random_1k',
            'random_2k',
@@ -26,8 +36,14 @@ __all__ = ['judge_error',
            'random_1kd']
 
 
-def judge_error(G, n_swap, max_tries, connected):
-    if not nx.is_connected(G):
+def judge_error(G, n_swap, max_tries, connected, window=False):
+    if connected not in ((0, 1, 2) if window else (0, 1)):
+        raise nx.NetworkXError("connected must be 0 or 1%s." %
+                               (" or 2" if window else ""))
+    if isinstance(G, CSRGraph):
+        if not G.is_connected():
+            raise nx.NetworkXError("For connected graphs only.")
+    elif not nx.is_connected(G):
         raise nx.NetworkXError("For connected graphs only.")
     if G.is_directed():
         raise nx.NetworkXError("For undirected graphs only.")
@@ -66,51 +82,285 @@ def count_degree_nodes(degree_nodes):
     return degree_dict
 
 
-def er_graph(G):
-    """Returns a random graph G_{n,p} (Erdős-Rényi graph, binomial graph).
+@accept_csr(native=lambda a: True)
+def er_graph(G, same_m=False):
+    """Returns a random graph G_{n,p} (Erdős-Rényi graph, binomial graph)
+    with the nodes and the density of G.
 
     Chooses each of the possible edges with probability p.
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    n : int
-        The number of nodes.
-    p : float
-        Probability for edge creation.
-    directed : bool, optional (default=False)
-        If True return a directed graph
+    same_m : bool (default = False)
+        If True return a graph G_{n,m}, drawn uniformly among the graphs
+        with the nodes of G and as many edges as G
 
     Notes
     -----
-    The G_{n,p} graph algorithm chooses each of the [n(n-1)]/2
-    (undirected) or n(n-1) (directed) possible edges with probability p.
+    The G_{n,p} graph algorithm chooses each of the n(n-1)/2 possible
+    edges with probability p = m / (n(n-1)/2), the density of G.  The
+    number of edges of G_{n,p} is binomial, so it is drawn first and the
+    graph is a G_{n,m} for it.  The m edges are drawn as indices of node
+    pairs, redrawing the repeated ones (the complement is drawn instead if
+    G is more than half full), in O(n + m) memory instead of the
+    O(n^2) loop of erdos_renyi_graph.
 
     References
     ----------
     .. [1] P. Erdős and A. Rényi, On Random Graphs, Publ. Math. 6, 290 (1959).
     .. [2] E. N. Gilbert, Random Graphs, Ann. Math. Stat., 30, 1141 (1959).
     """
-    n = len(G.nodes())
-    m = len(G.edges())
-    p = 2.0 * m / (n * n)
-    return nx.random_graphs.erdos_renyi_graph(n, p, directed=False)
+    n = len(G)
+    pairs = n * (n - 1) // 2
+    m = min(G.number_of_edges(), pairs)
+    if not same_m and pairs:
+        m = np.random.binomial(pairs, float(m) / pairs)
+    src, dst = _random_pairs(n, m)
+    if isinstance(G, CSRGraph):
+        return CSRGraph.from_edges(G.labels, src, dst, weight=G.weight)
+    nodes = list(G)
+    H = nx.Graph()
+    H.add_nodes_from(nodes)
+    H.add_edges_from((nodes[v], nodes[w])
+                     for v, w in zip(src.tolist(), dst.tolist()))
+    return H
+
+
+def _random_pairs(n, m):
+    # m distinct node pairs v < w of 0..n-1, drawn as indices
+    # i = w (w - 1) / 2 + v of the n (n - 1) / 2 pairs
+    pairs = n * (n - 1) // 2
+    complement = m > pairs // 2
+    k = pairs - m if complement else m
+    index = np.empty(0, dtype=np.int64)
+    while len(index) < k:
+        index = np.sort(np.concatenate(
+            (index, np.random.randint(0, pairs, k - len(index),
+                                      dtype=np.int64))))
+        # drop the repeated pairs, they are drawn again
+        index = index[np.concatenate(([True], index[1:] != index[:-1]))]
+    if complement:
+        index = np.setdiff1d(np.arange(pairs, dtype=np.int64), index,
+                             assume_unique=True)
+    w = ((1 + np.sqrt(1 + 8.0 * index)) // 2).astype(np.int64)
+    # the float root may be one off for large indices
+    w -= w * (w - 1) // 2 > index
+    w += (w + 1) * w // 2 <= index
+    return index - w * (w - 1) // 2, w
+
+
+@accept_csr(native=lambda a: True)
+def config_model(G, erase=False, max_rounds=100):
+    """Returns a random simple graph with the degree sequence of G
+
+    Parameters
+    ----------
+    G : undirected and unweighted graph
+    erase : bool (default = False)
+        Drop the self-loops and multi-edges of the stub matching instead of
+        rematching their stubs; the degrees then drop by a little
+    max_rounds : int (default = 100)
+        Maximum number of rematching rounds, the self-loops and
+        multi-edges left afterwards are dropped
 
+    Notes
+    -----
+    The stubs (one per unit of degree) of every node are shuffled once
+    and paired off, all in NumPy.  The pairs that are self-loops or repeat
+    an edge are then rematched in rounds: their stubs are shuffled again
+    together with the stubs of as many random pairs, which keeps every
+    degree.  A CSRGraph is returned for a CSRGraph G, a networkx graph on
+    the nodes of G otherwise.
 
-def config_model(G):
-    """Returns a random bipartite graph from the given graph
+    See Also
+    --------
+    joint_degree_model
+    """
+    degree = np.asarray(G.degree() if isinstance(G, CSRGraph) else
+                        [G.degree(node) for node in G], dtype=np.int64)
+    n = len(degree)
+    stubs = np.repeat(np.arange(n, dtype=np.int64), degree)
+    np.random.shuffle(stubs)
+    # an odd degree sum leaves one stub out
+    src, dst = stubs[0:len(stubs) - 1:2], stubs[1::2]
+    bad = _bad_pairs(src, dst, n)
+    rounds = 0
+    while bad.any() and not erase and rounds < max_rounds:
+        rounds += 1
+        # rematch the bad pairs together with as many random good pairs
+        good = np.flatnonzero(~bad)
+        pick = np.concatenate((np.flatnonzero(bad), np.random.choice(
+            good, min(len(good), np.count_nonzero(bad)), replace=False)))
+        pool = np.concatenate((src[pick], dst[pick]))
+        np.random.shuffle(pool)
+        src[pick], dst[pick] = pool[:len(pick)], pool[len(pick):]
+        bad = _bad_pairs(src, dst, n)
+    if bad.any():
+        if not erase:
+            print('Maximum number of rematching rounds (%s) exceeded, ' %
+                  rounds + '%s self-loops and multi-edges dropped.' %
+                  np.count_nonzero(bad))
+        src, dst = src[~bad], dst[~bad]
+    if isinstance(G, CSRGraph):
+        return CSRGraph.from_edges(G.labels, src, dst, weight=G.weight)
+    nodes = list(G)
+    H = nx.Graph()
+    H.add_nodes_from(nodes)
+    H.add_edges_from((nodes[v], nodes[w])
+                     for v, w in zip(src.tolist(), dst.tolist()))
+    return H
+
+
+def _bad_pairs(src, dst, n):
+    # the self-loops and the repeats of an earlier pair
+    key = np.minimum(src, dst) * n + np.maximum(src, dst)
+    order = np.argsort(key, kind='stable')
+    bad = src == dst
+    bad[order[1:]] |= key[order[1:]] == key[order[:-1]]
+    return bad
+
+
+@accept_csr
+def joint_degree_model(G, n_swap=0, max_tries=100):
+    """Returns a random simple graph with the joint degree matrix of G
 
     Parameters
     ----------
     G : undirected and unweighted graph
-    degree_seq : list
-        Degree sequence of the given graph G
+    n_swap : int (default = 0)
+        Number of 2K double-edge swaps to perform on the constructed graph
+    max_tries : int (default = 100)
+        Maximum number of attempts to swap edges
+
+    Notes
+    -----
+    Every node keeps its degree, and the number of edges between the nodes
+    of degree k and of degree l is the one of G, for every k and l.  The
+    graph is built directly instead of by a long random_2k chain: for each
+    pair of degree classes, two random nodes of the classes are joined
+    unless they are already adjacent; a node without free stubs first
+    hands one of its edges over to an unsaturated node of its class
+    (a neighbour switch, which keeps the counts of every pair of classes)
+    [1]_.  The graph need not be connected.
+
+    The n_swap swaps (without connectivity check) decorrelate the graph
+    further from the order of construction.
+
+    See Also
+    --------
+    random_2k
+
+    References
+    ----------
+    .. [1] I. Stanton and A. Pinar, Constructing and sampling graphs with a
+       prescribed joint degree distribution, ACM J. Exp. Algorithmics 17,
+       3.5 (2012).
     """
-    degree_seq = list(G.degree().values())
-    return nx.configuration_model(degree_seq)
+    if G.is_directed():
+        raise nx.NetworkXError("For undirected graphs only.")
+    if n_swap > max_tries:
+        raise nx.NetworkXError("Number of swaps > number of tries allowed.")
+    # nodes are numbered, so that the construction only depends on the seed
+    nodes = list(G)
+    index = dict((node, i) for i, node in enumerate(nodes))
+    degree = [G.degree(node) for node in nodes]
+    class_nodes = {}
+    for i, k in enumerate(degree):
+        class_nodes.setdefault(k, []).append(i)
+    jdm = {}
+    for u, v in G.edges():
+        if u == v:
+            raise nx.NetworkXError("Graph has self-loops.")
+        k, l = degree[index[u]], degree[index[v]]
+        if k < l:
+            k, l = l, k
+        jdm[(k, l)] = jdm.get((k, l), 0) + 1
+
+    adj = [set() for _ in nodes]
+    residual = list(degree)
+    unsaturated = dict((k, set(class_nodes[k])) for k in class_nodes)
+    for (k, l), n_edges in sorted(jdm.items()):
+        k_nodes, l_nodes = class_nodes[k], class_nodes[l]
+        while n_edges > 0:
+            v = random.choice(k_nodes)
+            w = random.choice(l_nodes)
+            if v == w or w in adj[v]:
+                continue
+            if residual[v] == 0:
+                _neighbor_switch(adj, residual, v, unsaturated[k])
+            if residual[w] == 0:
+                _neighbor_switch(adj, residual, w, unsaturated[l],
+                                 avoid=v if k == l else None)
+            adj[v].add(w)
+            adj[w].add(v)
+            residual[v] -= 1
+            residual[w] -= 1
+            if residual[v] == 0:
+                unsaturated[k].discard(v)
+            if residual[w] == 0:
+                unsaturated[l].discard(w)
+            n_edges -= 1
+
+    H = nx.Graph()
+    H.add_nodes_from(nodes)
+    H.add_edges_from((nodes[v], nodes[w])
+                     for v in range(len(nodes)) for w in adj[v] if v < w)
+    if n_swap > 0:
+        _polish_2k(H, n_swap, max_tries)
+    return H
+
+
+def _neighbor_switch(adj, residual, w, unsaturated, avoid=None):
+    # move an edge w-s to w2-s, w2 an unsaturated node of the degree of w,
+    # so that w gets a free stub; w2 must not be avoid if avoid needs its
+    # last stub for the edge about to be added
+    for w2 in unsaturated:
+        if w2 != avoid or residual[avoid] > 1:
+            break
+    for s in adj[w]:
+        if s not in adj[w2] and s != w2:
+            break
+    adj[w].discard(s)
+    adj[s].discard(w)
+    adj[w2].add(s)
+    adj[s].add(w2)
+    residual[w] += 1
+    residual[w2] -= 1
+    if residual[w2] == 0:
+        unsaturated.discard(w2)
+
+
+def _polish_2k(G, n_swap, max_tries):
+    # the swaps of random_2k without connectivity check, G need not be
+    # connected
+    if G.number_of_edges() < 2:
+        return G
+    edges = EdgeStore(G.edges())
+    buckets = DegreeBuckets(G)
+    n_try = 0
+    swapcount = 0
+    while swapcount < n_swap and n_try < max_tries:
+        n_try += 1
+        u, v = edges.choice()
+        x, y = buckets.choice(buckets.degree[v])
+        if len(set([u, v, x, y])) < 4 or y in G[u] or v in G[x]:
+            continue
+        G.add_edge(u, y)
+        G.add_edge(v, x)
+        G.remove_edge(u, v)
+        G.remove_edge(x, y)
+        edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+        buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])
+        swapcount += 1
+    if swapcount < n_swap:
+        print('Maximum number of swap attempts (%s) exceeded ' %
+              n_try + 'before desired swaps achieved (%s).' % n_swap)
+    return G
 
 
-def random_0k(G, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def random_0k(G, n_swap=1, max_tries=100, connected=1, inplace=False):
     """Returns a 0K null model beased on random reconnection algorithm
 
     Parameters
@@ -123,6 +373,8 @@ def random_0k(G, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
@@ -134,37 +386,37 @@ def random_0k(G, n_swap=1, max_tries=100, connected=1):
 
     """
     judge_error(G, n_swap, max_tries, connected)
+    if not inplace:
+        G = clone_graph(G)
 
     # Number of attempts to swap
     n_try = 0
     # Number of effective swaps
     swapcount = 0
-    edges = G.edges()
-    nodes = G.nodes()
+    edges = EdgeStore(G.edges())
+    nodes = list(G.nodes())
     while swapcount < n_swap:
         n_try = n_try + 1
         # choose a edge randomly
-        u, v = random.choice(edges)
+        u, v = edges.choice()
         # choose two nodes which are not connected
         x, y = random.sample(nodes, 2)
         if len(set([u, v, x, y])) < 4:
             continue
-        if (x, y) not in edges and (y, x) not in edges:
+        if (x, y) not in edges:
             # cut the original edge
             G.remove_edge(u, v)
             # connect the new edge
             G.add_edge(x, y)
-            edges.remove((u, v))
-            edges.append((x, y))
+            edges.replace((u, v), (x, y))
 
             # if connected = 1 but the original graph is not connected fully,
             # withdraw the operation about the swap of edges.
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v)]):
+                    G.remove_edge(x, y)
                     G.add_edge(u, v)
-                    G.add_edge(x, y)
-                    G.remove_edge(u, y)
-                    G.remove_edge(x, v)
+                    edges.replace((x, y), (u, v))
                     continue
             swapcount += 1
 
@@ -175,7 +427,16 @@ def random_0k(G, n_swap=1, max_tries=100, connected=1):
     return G
 
 
-def random_1k(G, n_swap=1, max_tries=100, connected=1):
+def _csr_loop(a):
+    # the swap loop runs on a CSRGraph itself (see csr_graph), but not in
+    # windowed mode, nor with a weight column as the new edges have none
+    return a['connected'] != 2 and a['G'].weights is None
+
+
+@accept_csr(native=lambda a: (not a['connected'] if a['block_size'] else
+                              _csr_loop(a)))
+def random_1k(G, n_swap=1, max_tries=100, connected=1, block_size=None,
+              inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     Parameters
@@ -188,21 +449,45 @@ def random_1k(G, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    block_size : int, optional
+        Draw the proposals block_size at a time with NumPy (see
+        block_swap). By default they are drawn one at a time.
+        In block mode with connected = 0 a CSRGraph is rewired without
+        converting it to networkx.
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
     The 1K null models require reproducing the original graph’s
     node degree distribution.
+    An unweighted CSRGraph is rewired in its own arrays and overlay with
+    connected = 0 or 1 (see csr_graph).
 
     """
 
-    judge_error(G, n_swap, max_tries, connected)
+    if isinstance(G, CSRGraph) and block_size:
+        if G.is_directed():
+            raise nx.NetworkXError("For undirected graphs only.")
+        if n_swap > max_tries:
+            raise nx.NetworkXError("Number of swaps > number of tries allowed.")
+        if not inplace:
+            G = clone_graph(G)
+        return block_swap(G, n_swap, max_tries, block_size=block_size)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if not inplace:
+        G = clone_graph(G)
+    if block_size:
+        return block_swap(G, n_swap, max_tries, connected=connected,
+                          block_size=block_size)
 
     n_try = 0
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    edges = EdgeStore.of(G)
+    if connected == 2:
+        window = SwapWindow(G, edges=edges)
 
     while swapcount < n_swap:
         if n_try >= max_tries:
@@ -213,13 +498,9 @@ def random_1k(G, n_swap=1, max_tries=100, connected=1):
 
         # Keep the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        x, y = edges.choice()
         # make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # make sure the new edges are not exist in the original graph
@@ -230,20 +511,29 @@ def random_1k(G, n_swap=1, max_tries=100, connected=1):
                 # delete two old edges
                 G.remove_edge(u, v)
                 G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
                 # if connected = 1 but the original graph is not connected fully,
                 # withdraw the operation about the swap of edges.
                 if connected == 1:
-                    if not nx.is_connected(G):
+                    if not swap_connected(G, [(u, v), (x, y)]):
                         G.add_edge(u, v)
                         G.add_edge(x, y)
                         G.remove_edge(u, y)
                         G.remove_edge(x, v)
+                        edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
                         continue
                 swapcount += 1
+                if connected == 2:
+                    swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                             flush=swapcount == n_swap)
+    if connected == 2:
+        window.flush()
     return G
 
 
-def random_2k(G, n_swap=1, max_tries=100, connected=1):
+@accept_csr(native=_csr_loop)
+def random_2k(G, n_swap=1, max_tries=100, connected=1, inplace=False,
+              verbose=False):
     """Returns a 2K null model beased on random reconnection algorithm
 
     Parameters
@@ -256,19 +546,32 @@ def random_2k(G, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+        2 : keep, checked once per window of swaps (see SwapWindow)
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    verbose : bool (default = False)
+        Print the acceptance rate of the tries at the end
 
     Notes
     -----
     The 2K null models have the same joint degree distribution as the original graph
+    The second edge x-y is drawn among the edges whose end y has the degree
+    of v (see DegreeBuckets) instead of being rejected afterwards.
+    An unweighted CSRGraph is rewired in its own arrays and overlay with
+    connected = 0 or 1 (see csr_graph).
 
     """
     # make sure the 2K-characteristic unchanged and the graph is connected
     # swap the edges inside the community
-    judge_error(G, n_swap, max_tries, connected)
+    judge_error(G, n_swap, max_tries, connected, window=True)
+    if not inplace:
+        G = clone_graph(G)
     n_try = 0
     swapcount = 0
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    edges = EdgeStore.of(G)
+    buckets = DegreeBuckets.of(G)
+    if connected == 2:
+        window = SwapWindow(G, edges=[edges, buckets])
 
     while swapcount < n_swap:
         if n_try >= max_tries:
@@ -279,41 +582,49 @@ def random_2k(G, n_swap=1, max_tries=100, connected=1):
 
         # make sure the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        # make sure the degree matching characteristic of the nodes remain
+        # unchanged: y has the degree of v
+        x, y = buckets.choice(buckets.degree[v])
 
         # make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
-            # make sure the degree matching characteristic of the nodes remain
-            # unchanged
-            if G.degree(v) == G.degree(y):
-                # make sure the new edges are not exist in the original graph
-                if (y not in G[u]) and (v not in G[x]):
-                        # add two new edges
-                    G.add_edge(u, y)
-                    G.add_edge(v, x)
-                    # delete two old edges
-                    G.remove_edge(u, v)
-                    G.remove_edge(x, y)
-                    # if connected = 1 but the original graph is not connected fully,
-                    # withdraw the operation about the swap of edges.
-                    if connected == 1:
-                        if not nx.is_connected(G):
-                            G.add_edge(u, v)
-                            G.add_edge(x, y)
-                            G.remove_edge(u, y)
-                            G.remove_edge(x, v)
-                            continue
-                    swapcount += 1
+            # make sure the new edges are not exist in the original graph
+            if (y not in G[u]) and (v not in G[x]):
+                # add two new edges
+                G.add_edge(u, y)
+                G.add_edge(v, x)
+                # delete two old edges
+                G.remove_edge(u, v)
+                G.remove_edge(x, y)
+                edges.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                buckets.swap([(u, v), (x, y)], [(u, y), (v, x)])
+                # if connected = 1 but the original graph is not connected fully,
+                # withdraw the operation about the swap of edges.
+                if connected == 1:
+                    if not swap_connected(G, [(u, v), (x, y)]):
+                        G.add_edge(u, v)
+                        G.add_edge(x, y)
+                        G.remove_edge(u, y)
+                        G.remove_edge(x, v)
+                        edges.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                        buckets.swap([(u, y), (v, x)], [(u, v), (x, y)])
+                        continue
+                swapcount += 1
+                if connected == 2:
+                    swapcount -= window.push([(u, v), (x, y)], [(u, y), (v, x)],
+                                             flush=swapcount == n_swap)
+    if connected == 2:
+        swapcount -= window.flush()
+    if verbose:
+        print('Acceptance rate: %s swaps in %s tries (%.1f%%).' %
+              (swapcount, n_try, 100.0 * swapcount / max(n_try, 1)))
     return G
 
 
-def random_25k(G0, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def random_25k(G0, n_swap=1, max_tries=100, connected=1, inplace=False):
     """Returns a 2.5K null model beased on random reconnection algorithm
 
     Parameters
@@ -326,10 +637,14 @@ def random_25k(G0, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
     The 2.5K null models has the same clustering spectrum and joint degree distribution with the original network
+    The spectrum is checked exactly with triangle counts that are updated
+    from the common neighbours of the swapped edges (see TriangleCounts).
 
     """
     # make sure the 2K-characteristic unchanged and the graph is connected
@@ -338,9 +653,9 @@ def random_25k(G0, n_swap=1, max_tries=100, connected=1):
 
     n_try = 0
     swapcount = 0
-    G = copy.deepcopy(G0)
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    G = G0 if inplace else clone_graph(G0)
+    edges = EdgeStore(G.edges())
+    triangles = TriangleCounts(G)
 
     while swapcount < n_swap:
         if n_try >= max_tries:
@@ -351,13 +666,9 @@ def random_25k(G0, n_swap=1, max_tries=100, connected=1):
 
         # make sure the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        x, y = edges.choice()
         # make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # make sure the degree matching characteristic of the nodes remain
@@ -365,47 +676,27 @@ def random_25k(G0, n_swap=1, max_tries=100, connected=1):
             if G.degree(v) == G.degree(y):
                 # make sure the new edges are not exist in the original graph
                 if (y not in G[u]) and (v not in G[x]):
-                    G.add_edge(u, y)
-                    G.add_edge(v, x)
-
-                    G.remove_edge(u, v)
-                    G.remove_edge(x, y)
-                    # get the degree of four nodes and their neighbor nodes,
-                    # degree_node_list : [[degree,node]]
-                    degree_node_list = map(lambda t: (t[1], t[0]), G0.degree(
-                        [u, v, x, y] + list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])).items())
-                    # get all nodes of each degree :{degree:[node1,node2...]}
-                    dict_degree = count_degree_nodes(degree_node_list)
-
-                    for i in range(len(dict_degree)):
-                        avcG0 = nx.average_clustering(
-                            G0, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                        avcG = nx.average_clustering(
-                            G, nodes=list(dict_degree.values())[i], weight=None, count_zeros=True)
-                        i += 1
-                    # if the clustering coefficient about dgree changed after
-                    # scrambling ,withdraw this operation
-                    if avcG0 != avcG:
-                        G.add_edge(u, v)
-                        G.add_edge(x, y)
-                        G.remove_edge(u, y)
-                        G.remove_edge(x, v)
-                        break
-                    # if connected = 1 but the original graph is not connected fully,
-                    # withdraw the operation about the swap of edges.
-                    if connected == 1:
-                        if not nx.is_connected(G):
-                            G.add_edge(u, v)
-                            G.add_edge(x, y)
-                            G.remove_edge(u, y)
-                            G.remove_edge(x, v)
-                            continue
-
+                    removed = [(u, v), (x, y)]
+                    added = [(u, y), (v, x)]
+                    delta = triangles.swap(removed, added)
+                    edges.swap(removed, added)
+                    # if the triangles of a degree class, i.e. the
+                    # clustering spectrum, changed, withdraw this operation
+                    # if connected = 1 but the new graph is not connected
+                    # fully, withdraw it as well
+                    if triangles.class_delta(delta) or (
+                            connected == 1 and not swap_connected(G, removed)):
+                        G.remove_edges_from(added)
+                        G.add_edges_from(removed)
+                        edges.swap(added, removed)
+                        continue
+                    triangles.commit(delta)
                     swapcount += 1
     return G
 
 
-def random_3k(G0, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def random_3k(G0, n_swap=1, max_tries=100, connected=1, inplace=False):
     """Returns a 3K null model beased on random reconnection algorithm
 
     Parameters
@@ -418,10 +709,14 @@ def random_3k(G0, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G0 itself instead of a copy of it
 
     Notes
     -----
     3K null model, which is considered interconnectivity among triples of nodes
+    A swap is kept only if no triangle count changes; the counts follow
+    from the common neighbours of the swapped edges (see TriangleCounts).
 
     """
 
@@ -431,9 +726,9 @@ def random_3k(G0, n_swap=1, max_tries=100, connected=1):
 
     n_try = 0
     swapcount = 0
-    G = copy.deepcopy(G0)
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    G = G0 if inplace else clone_graph(G0)
+    edges = EdgeStore(G.edges())
+    triangles = TriangleCounts(G)
 
     while swapcount < n_swap:
         if n_try >= max_tries:
@@ -444,13 +739,9 @@ def random_3k(G0, n_swap=1, max_tries=100, connected=1):
 
         # make sure the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        x, y = edges.choice()
         # make sure the four nodes are not repeated
         if len(set([u, v, x, y])) == 4:
             # make sure the degree matching characteristic of the nodes remain
@@ -458,41 +749,27 @@ def random_3k(G0, n_swap=1, max_tries=100, connected=1):
             if G.degree(v) == G.degree(y):
                 # make sure the new edges are not exist in the original graph
                 if (y not in G[u]) and (v not in G[x]):
-                    G.add_edge(u, y)
-                    G.add_edge(v, x)
-
-                    G.remove_edge(u, v)
-                    G.remove_edge(x, y)
-
-                    # get the set of four nodes and their neighbor nodes
-                    node_list = [u, v, x, y] + \
-                        list(G[u]) + list(G[v]) + list(G[x]) + list(G[y])
-                    # cal the clustering coefficient of the four nodes in the
-                    # original and the new graph
-                    avcG0 = nx.clustering(G, nodes=node_list)
-                    avcG = nx.clustering(G, nodes=node_list)
-                    # if the clustering coefficient about dgree changed after
-                    # scrambling ,withdraw this operation
-                    if avcG0 != avcG:
-                        G.add_edge(u, v)
-                        G.add_edge(x, y)
-                        G.remove_edge(u, y)
-                        G.remove_edge(x, v)
+                    removed = [(u, v), (x, y)]
+                    added = [(u, y), (v, x)]
+                    delta = triangles.swap(removed, added)
+                    edges.swap(removed, added)
+                    # The degrees are kept, so the clustering coefficient of a
+                    # node changes iff its triangles do.  Withdraw the swap if
+                    # it changed any, or if connected = 1 but the new graph is
+                    # not connected fully.
+                    if triangles.node_delta(delta) or (
+                            connected == 1 and not swap_connected(G, removed)):
+                        G.remove_edges_from(added)
+                        G.add_edges_from(removed)
+                        edges.swap(added, removed)
                         continue
-                    # if connected = 1 but the original graph is not connected fully,
-                    # withdraw the operation about the swap of edges.
-                    if connected == 1:
-                        if not nx.is_connected(G):
-                            G.add_edge(u, v)
-                            G.add_edge(x, y)
-                            G.remove_edge(u, y)
-                            G.remove_edge(x, v)
-                            continue
                     swapcount += 1
     return G
 
 
-def rich_club_create(G, k=1, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def rich_club_create(G, k=1, n_swap=1, max_tries=100, connected=1,
+                     inplace=False):
     """Returns a null model where the rich-club connectivity is preserved.
 
     choose two edges between hubs and non-hubs randomly, if there is no edge between hubs and between non-hubs,
@@ -510,42 +787,54 @@ def rich_club_create(G, k=1, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
     hub_edges : the edges between hubs
     nonhub_edges : the edges between non-hubs
 
+    The two edges are drawn from a pool of the edges between a hub and a
+    non-hub, so a try costs O(1) whatever k is.
+
     """
 
     judge_error(G, n_swap, max_tries, connected)
+    if not inplace:
+        G = clone_graph(G)
 
     n_try = 0
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    # all hubs
-    hubs = [e for e in G.nodes() if G.degree()[e] >= k]
-    # the edges between hubs that exist in original graph
-    hubs_edges = [e for e in G.edges() if G.degree()[e[0]] >= k and G.degree()[
-        e[1]] >= k]
+    # degrees and hubs, computed once
+    degree = dict(G.degree())
+    hubs = set(node for node, d in degree.items() if d >= k)
+    # the number of edges between hubs, and the edges (hub, non-hub)
+    n_hubs_edges = 0
+    cross_edges = EdgeStore(directed=True)
+    for u, v in G.edges():
+        if u in hubs and v in hubs:
+            n_hubs_edges += 1
+        elif u in hubs:
+            cross_edges.add(u, v)
+        elif v in hubs:
+            cross_edges.add(v, u)
     # the number of edges between all hubs
     len_possible_edges = len(hubs) * (len(hubs) - 1) / 2
 
-    while swapcount < n_swap and len(hubs_edges) < len_possible_edges:
+    while (swapcount < n_swap and n_hubs_edges < len_possible_edges and
+           len(cross_edges) >= 2):
         if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' %
                   n_try + 'before desired swaps achieved (%s).' % n_swap)
             break
         n_try += 1
-        #  choose two hubs randomly
-        u, y = random.sample(hubs, 2)
-        v = random.choice(list(G[u]))
-        x = random.choice(list(G[y]))
-        if len(set([u, v, x, y])) == 4:
-            # the other node is not a hub
-            if G.degree()[v] > k or G.degree()[x] > k:
-                continue
+        # choose two edges between a hub and a non-hub randomly
+        u, v = cross_edges.choice()
+        y, x = cross_edges.choice()
+        if u == y or v == x:
+            continue
         # make sure the new edges are not exist in the original graph
         if (y not in G[u]) and (v not in G[x]):
             G.add_edge(u, y)
@@ -554,27 +843,29 @@ def rich_club_create(G, k=1, n_swap=1, max_tries=100, connected=1):
             G.remove_edge(u, v)
             G.remove_edge(x, y)
             # update edges between hubs
-            hubs_edges.append((u, y))
+            n_hubs_edges += 1
+            cross_edges.remove(u, v)
+            cross_edges.remove(y, x)
             # if connected = 1 but the original graph is not connected fully,
             # withdraw the operation about the swap of edges.
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v), (x, y)]):
                     G.add_edge(u, v)
                     G.add_edge(x, y)
 
                     G.remove_edge(u, y)
                     G.remove_edge(x, v)
-                    hubs_edges.remove((u, y))
+                    n_hubs_edges -= 1
+                    cross_edges.add(u, v)
+                    cross_edges.add(y, x)
                     continue
-
-        if n_try >= max_tries:
-            print('Maximum number of attempts (%s) exceeded ' % n_try)
-            break
-        swapcount += 1
+            swapcount += 1
     return G
 
 
-def rich_club_break(G, k=10, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def rich_club_break(G, k=10, n_swap=1, max_tries=100, connected=1,
+                    inplace=False):
     """Returns a null model where the rich-club connectivity is not preserved.
 
     choose two edges between hubs and non-hubs randomly, if there is no edge between hubs and non-hubs,
@@ -592,6 +883,8 @@ def rich_club_break(G, k=10, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
 
     Notes
     -----
@@ -601,25 +894,31 @@ def rich_club_break(G, k=10, n_swap=1, max_tries=100, connected=1):
     """
 
     judge_error(G, n_swap, max_tries, connected)
+    if not inplace:
+        G = clone_graph(G)
 
     n_try = 0
     swapcount = 0
 
-    hubs_edges = []
-    nonhub_edges = []
-    # all hubs
-    hubs = [e for e in G.nodes() if G.degree()[e] > k]
+    # all hubs, from the degrees computed once
+    degree = dict(G.degree())
+    hubs = set(node for node, d in degree.items() if d > k)
+    hubs_edges = EdgeStore()
+    nonhub_edges = EdgeStore()
     for e in G.edges():
         if e[0] in hubs and e[1] in hubs:
-            hubs_edges.append(e)
+            hubs_edges.add(*e)
         elif e[0] not in hubs and e[1] not in hubs:
-            nonhub_edges.append(e)
+            nonhub_edges.add(*e)
 
-    swapcount = 0
-    while swapcount < n_swap and hubs_edges and nonhub_edges:
+    while swapcount < n_swap and len(hubs_edges) and len(nonhub_edges):
+        if n_try >= max_tries:
+            print('Maximum number of attempts (%s) exceeded ' % n_try)
+            break
+        n_try += 1
         # choose two edges(hub and non-hub) randomly
-        u, v = random.choice(hubs_edges)
-        x, y = random.choice(nonhub_edges)
+        u, v = hubs_edges.choice()
+        x, y = nonhub_edges.choice()
         if len(set([u, v, x, y])) < 4:
             continue
         # make sure the new edges are not exist in the original graph
@@ -628,27 +927,26 @@ def rich_club_break(G, k=10, n_swap=1, max_tries=100, connected=1):
             G.add_edge(x, v)
             G.remove_edge(u, v)
             G.remove_edge(x, y)
-            hubs_edges.remove((u, v))
-            nonhub_edges.remove((x, y))
+            hubs_edges.remove(u, v)
+            nonhub_edges.remove(x, y)
             # if connected = 1 but the original graph is not connected fully,
             # withdraw the operation about the swap of edges.
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v), (x, y)]):
                     G.add_edge(u, v)
                     G.add_edge(x, y)
                     G.remove_edge(u, y)
                     G.remove_edge(x, v)
-                    hubs_edges.append((u, v))
-                    nonhub_edges.append((x, y))
+                    hubs_edges.add(u, v)
+                    nonhub_edges.add(x, y)
                     continue
-        if n_try >= max_tries:
-            print('Maximum number of attempts (%s) exceeded ' % n_try)
-            break
-        swapcount += 1
+            swapcount += 1
     return G
 
 
-def assort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def assort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1,
+                  inplace=False, target_r=None):
     """Returns a assortative graph
 
     choose two edges (four nodes) randomly, sort these nodes by degree,
@@ -666,60 +964,76 @@ def assort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    target_r : float, optional
+        Stop as soon as the degree assortativity coefficient of G is >=
+        target_r instead of after n_swap swaps (see AssortativityTracker)
 
     Notes
     -----
     """
 
     judge_error(G, n_swap, max_tries, connected)
+    if not inplace:
+        G = clone_graph(G)
 
     n_try = 0
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    degree = assortativity.degree
 
-    while swapcount < n_swap:
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() >= target_r:
+            break
+        if n_try >= max_tries:
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
+            break
         n_try += 1
 
         # make sure the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        x, y = edges.choice()
 
         if len(set([u, v, x, y])) < 4:
             continue
-        sortednodes = zip(
-            *sorted(G.degree([u, v, x, y]).items(), key=lambda d: d[1], reverse=True))[0]
-        if (sortednodes[0] not in G[sortednodes[1]]) and (sortednodes[2] not in G[sortednodes[3]]):
-            # make sure the new edges are not exist in the original graph
-
-            G.add_edge(sortednodes[0], sortednodes[1])
-            G.add_edge(sortednodes[2], sortednodes[3])
+        # connect the two nodes of largest degree, and the other two
+        a, b, c, d = sorted([u, v, x, y], key=degree.get, reverse=True)
+        # make sure the new edges are not exist in the original graph
+        if (a not in G[b]) and (c not in G[d]):
+            G.add_edge(a, b)
+            G.add_edge(c, d)
             G.remove_edge(x, y)
             G.remove_edge(u, v)
+            edges.swap([(u, v), (x, y)], [(a, b), (c, d)])
 
             if connected == 1:
-                if not nx.is_connected(G):
-                    G.remove_edge(sortednodes[0], sortednodes[1])
-                    G.remove_edge(sortednodes[2], sortednodes[3])
+                if not swap_connected(G, [(u, v), (x, y)]):
+                    G.remove_edge(a, b)
+                    G.remove_edge(c, d)
                     G.add_edge(x, y)
                     G.add_edge(u, v)
+                    edges.swap([(a, b), (c, d)], [(u, v), (x, y)])
                     continue
-        if n_try >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' %
-                  n_try + 'before desired swaps achieved (%s).' % n_swap)
-            break
-        swapcount += 1
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, b), (c, d)]))
+            swapcount += 1
     return G
 
 
-def disassort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1):
+@accept_csr
+def disassort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1,
+                     inplace=False, target_r=None):
     """Returns a disassortative graph
 
     choose two edges (four nodes) randomly, sort these nodes by degree,
@@ -737,6 +1051,11 @@ def disassort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1):
     connected : int
         keep the connectivity of the graph or not.
         1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+    target_r : float, optional
+        Stop as soon as the degree assortativity coefficient of G is <=
+        target_r instead of after n_swap swaps (see AssortativityTracker)
 
     Notes
     -----
@@ -744,55 +1063,65 @@ def disassort_mixing(G, k=10, n_swap=1, max_tries=100, connected=1):
     """
 
     judge_error(G, n_swap, max_tries, connected)
+    if not inplace:
+        G = clone_graph(G)
 
     n_try = 0
     swapcount = 0
 
-    keys, degrees = zip(*G.degree().items())
-    cdf = nx.utils.cumulative_distribution(degrees)
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    degree = assortativity.degree
 
-    while swapcount < n_swap:
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() <= target_r:
+            break
+        if n_try >= max_tries:
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' %
+                      n_try + 'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
+            break
         n_try += 1
 
         # make sure the degree distribution unchanged,choose two edges
         # (u-v,x-y) randomly
-        (ui, xi) = nx.utils.discrete_sequence(2, cdistribution=cdf)
-        if ui == xi:
-            continue
-        u = keys[ui]
-        x = keys[xi]
-        v = random.choice(list(G[u]))
-        y = random.choice(list(G[x]))
+        # (a uniform stub is a degree-weighted node plus a uniform neighbour)
+        u, v = edges.choice()
+        x, y = edges.choice()
 
         if len(set([u, v, x, y])) < 4:
             continue
-        sortednodes = zip(
-            *sorted(G.degree([u, v, x, y]).items(), key=lambda d: d[1], reverse=True))[0]
-        if (sortednodes[0] not in G[sortednodes[3]]) and (sortednodes[1] not in G[sortednodes[2]]):
-            # make sure the new edges are not exist in the original graph
-
-            G.add_edge(sortednodes[0], sortednodes[3])
-            G.add_edge(sortednodes[1], sortednodes[2])
+        # connect the nodes of largest and smallest degree, and the other two
+        a, b, c, d = sorted([u, v, x, y], key=degree.get, reverse=True)
+        # make sure the new edges are not exist in the original graph
+        if (a not in G[d]) and (b not in G[c]):
+            G.add_edge(a, d)
+            G.add_edge(b, c)
             G.remove_edge(x, y)
             G.remove_edge(u, v)
+            edges.swap([(u, v), (x, y)], [(a, d), (b, c)])
 
             if connected == 1:
-                if not nx.is_connected(G):
-                    G.remove_edge(sortednodes[0], sortednodes[3])
-                    G.remove_edge(sortednodes[1], sortednodes[2])
+                if not swap_connected(G, [(u, v), (x, y)]):
+                    G.remove_edge(a, d)
+                    G.remove_edge(b, c)
                     G.add_edge(x, y)
                     G.add_edge(u, v)
+                    edges.swap([(a, d), (b, c)], [(u, v), (x, y)])
                     continue
-        if n_try >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' %
-                  n_try + 'before desired swaps achieved (%s).' % n_swap)
-            break
-        swapcount += 1
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, d), (b, c)]))
+            swapcount += 1
     return G
 
 
 # to be connected...
-def random_1kd(G, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def random_1kd(G, n_swap=1, max_tries=100, inplace=False):
     """Returns a 1K null model beased on random reconnection algorithm
 
     choose two edges (u->v and x->y), if u->y and x->v don't exist ,reconnect these edges.
@@ -803,9 +1132,14 @@ def random_1kd(G, n_swap=1, max_tries=100):
         Number of double-edge swaps to perform
     max_tries : int (default = 100)
         Maximum number of attempts to swap edges
-    connected : int
-        keep the connectivity of the graph or not.
-        1 : keep,    0 : not keep
+    inplace : bool (default = False)
+        Rewire G itself instead of a copy of it
+
+    Notes
+    -----
+    The swaps run on integer edge arrays with a hash map of packed edge
+    keys (see directed_swap), so a try is O(1).  A CSRGraph is rewired
+    without converting it to networkx.
 
     """
     if not G.is_directed():
@@ -814,22 +1148,6 @@ def random_1kd(G, n_swap=1, max_tries=100):
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G) < 4:
         raise nx.NetworkXError("This graph has less than four nodes.")
-    n_try = 0
-    swapcount = 0
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(G.edges(), 2)
-        if len(set([u, v, x, y])) < 4:
-            continue
-        # reconnection
-        if (x, v) not in G.edges() and (u, y) not in G.edges():
-            G.add_edge(u, y)
-            G.add_edge(x, v)
-            G.remove_edge(u, v)
-            G.remove_edge(x, y)
-            swapcount += 1
-        if n_try >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' %
-                  n_try + 'before desired swaps achieved (%s).' % n_swap)
-            break
-        n_try += 1
-    return G
+    if not inplace:
+        G = clone_graph(G)
+    return directed_swap(G, n_swap, max_tries)
@@ -1,8 +1,19 @@
 # -*- coding: utf-8 -*-
+import os
+import sys
 import networkx as nx
-import copy
 import random
 
+# the swap helpers are shared with the unweighted null models
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, 'unweighted'))
+from null_model_core.assortativity import AssortativityTracker
+from null_model_core.edge_store import EdgeStore
+from null_model_core.connectivity import swap_connected
+from null_model_core.clone import clone_graph
+from null_model_core.csr_graph import accept_csr
+from null_model_core.directed_swap import directed_swap
+
 
 __all__ = ['random_0k',
            'random_1k',
@@ -23,11 +34,15 @@ __all__ = ['random_0k',
            'random_in_1w']
 
 
-def random_0k(G, n_swap=1, max_tries=100, connected=1):  # 保持连通性的0阶零模型
+@accept_csr
+def random_0k(G, n_swap=1, max_tries=100, connected=1, inplace=False):  # 保持连通性的0阶零模型
     """# 从网络中随机选一条边和两个不相连的节点，断边重连，且新连边权重等于断开的那条边的权重
     在random_0k()的基础上增加连通性判断，若置乱后的网络不保持连通性则撤销该置乱操作
     注：G0为连通网络
+    inplace=True 时直接置乱 G, 否则置乱 G 的结构副本
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if connected == 1:
@@ -35,27 +50,27 @@ def random_0k(G, n_swap=1, max_tries=100, connected=1):  # 保持连通性的0
             raise nx.NetworkXError("Graph not connected")
     if len(G) < 3:
         raise nx.NetworkXError("Graph has less than three nodes.")
+    if not inplace:
+        G = clone_graph(G)
     n_try = 0
     swapcount = 0
-    edges = G.edges()
-    nodes = G.nodes()
+    edges = EdgeStore(G.edges())
+    nodes = list(G.nodes())
     while swapcount < n_swap:
-        u, v = random.choice(edges)  # 随机选一条要断开的边
+        u, v = edges.choice()  # 随机选一条要断开的边
         x, y = random.sample(nodes, 2)  # 随机找两个节点
         if x not in G[y]:  # 若x,y不相连，则断边重连
             G.add_edge(x, y, weight=G[u][v]['weight'])
             G.remove_edge(u, v)
-            edges.append((x, y))
-            edges.remove((u, v))
+            edges.replace((u, v), (x, y))
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v)]):
                     G.add_edge(u, v, weight=G[x][y]['weight'])
                     G.remove_edge(x, y)
-                    edges.remove((x, y))
-                    edges.append((u, v))
+                    edges.replace((x, y), (u, v))
                     continue
             swapcount += 1
-        if n >= max_tries:
+        if n_try >= max_tries:
             print('Maximum number of swap attempts (%s) exceeded ' % n_try +
                  'before desired swaps achieved (%s).' % n_swap)
             break
@@ -63,11 +78,15 @@ def random_0k(G, n_swap=1, max_tries=100, connected=1):  # 保持连通性的0
     return G
 
 
-def random_1k(G, n_swap=1, max_tries=100,connected=1):  # 保持连通性下权重置乱的1阶零模型
+@accept_csr
+def random_1k(G, n_swap=1, max_tries=100,connected=1, inplace=False):  # 保持连通性下权重置乱的1阶零模型
     """随机取两条边 u-v 和 x-y, 且节点u和x,v和y无连边, 则断边重连,w(u,x)=w(u,v)及w(v,y)=w(x,y)
     在random_1k()的基础上增加连通性判断，若置乱后的网络不保持连通性则撤销该置乱操作
     注：G0为连通网络
+    inplace=True 时直接置乱 G, 否则置乱 G 的结构副本
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
         if not nx.is_connected(G):
             raise nx.NetworkXError("Graph not connected")
@@ -76,30 +95,30 @@ def random_1k(G, n_swap=1, max_tries=100,connected=1):  # 保持连通性下权
     if len(G) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
 
+    if not inplace:
+        G = clone_graph(G)
     n_try = 0
     swapcount = 0
-    edges = G.edges()
+    edges = EdgeStore(G.edges())
     while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)
+        (u, v), (x, y) = edges.sample_pair()
         if len(set([u, v, x, y])) < 4:  # 防止自环
             continue
-        if (x, u) not in edges and (u, x) not in edges and (y, v) not in edges and (v, y) not in edges:
+        if (x, u) not in edges and (y, v) not in edges:
             G.add_edges_from([(u, x), (v, y)])
             G[u][x]['weight'] = G[u][v]['weight']
             G[v][y]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(u, x), (v, y)])
-            edges.remove((u, v))
-            edges.remove((x, y))           
+            edges.replace((u, v), (u, x))
+            edges.replace((x, y), (v, y))
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v), (x, y)]):
                     G.add_edges_from([(u, v), (x, y)])
                     G[u][v]['weight'] = G[u][x]['weight']
                     G[x][y]['weight'] = G[v][y]['weight']
                     G.remove_edges_from([(u, x), (v, y)])
-                    edges.remove((u, x))
-                    edges.remove((v, y))
-                    edges.extend([(u, v), (x, y)])
+                    edges.replace((u, x), (u, v))
+                    edges.replace((v, y), (x, y))
                     continue
             swapcount += 1
         if n_try >= max_tries:
@@ -110,10 +129,14 @@ def random_1k(G, n_swap=1, max_tries=100,connected=1):  # 保持连通性下权
     return G
 
 
-def random_sw(G, n_swap=1, max_tries=100,connected=1):  # 保持联通性的等权重置乱
+@accept_csr
+def random_sw(G, n_swap=1, max_tries=100,connected=1, inplace=False):  # 保持联通性的等权重置乱
     """任选两条权重相同的边u-v,x-y,若u-x,v-y不相连，则断边重连
     增加联通性判断即可
+    inplace=True 时直接置乱 G, 否则置乱 G 的结构副本
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
         if not nx.is_connected(G):
             raise nx.NetworkXError("Graph not connected")
@@ -122,33 +145,33 @@ def random_sw(G, n_swap=1, max_tries=100,connected=1):  # 保持联通性的等
     if len(G) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
 
+    if not inplace:
+        G = clone_graph(G)
     n_try = 0
     swapcount = 0
-    edges = G.edges()
+    edges = EdgeStore(G.edges())
     while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)
+        (u, v), (x, y) = edges.sample_pair()
         if len(set([u, v, x, y])) < 4:  # 防止自环
             continue
         if G[u][v]['weight'] != G[x][y]['weight']:
             continue
-        if (x, u) not in edges and (u, x) not in edges and (y, v) not in edges and (v, y) not in edges:
+        if (x, u) not in edges and (y, v) not in edges:
             G.add_edges_from([(u, x), (v, y)])
             G[u][x]['weight'] = G[u][v]['weight']
             G[v][y]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(u, x), (v, y)])
-            edges.remove((u, v))
-            edges.remove((x, y))
+            edges.replace((u, v), (u, x))
+            edges.replace((x, y), (v, y))
 
             if connected == 1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v), (x, y)]):
                     G.add_edges_from([(u, v), (x, y)])
                     G[u][v]['weight'] = G[u][x]['weight']
                     G[x][y]['weight'] = G[v][y]['weight']
                     G.remove_edges_from([(u, x), (v, y)])
-                    edges.remove((v, y))
-                    edges.remove((u, x))
-                    edges.extend([(u, v), (x, y)])
+                    edges.replace((u, x), (u, v))
+                    edges.replace((v, y), (x, y))
                     continue
             swapcount += 1
         if n_try >= max_tries:
@@ -159,37 +182,41 @@ def random_sw(G, n_swap=1, max_tries=100,connected=1):  # 保持联通性的等
     return G
 
 
-def random_w(G0, n_swap=1, max_tries=100):  # 权重置乱
+@accept_csr
+def random_w(G0, n_swap=1, max_tries=100, inplace=False):  # 权重置乱
     """
     任取两条权重不相同的边，互换权重
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
     """
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 3:
         raise nx.NetworkXError("Graph has less than three nodes.")
 
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
-    edges = G.edges()
+    edges = EdgeStore(G.edges())
     while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)
+        (u, v), (x, y) = edges.sample_pair()
         if G[u][v]['weight'] != G[x][y]['weight']:
             G[u][v]['weight'], G[x][y]['weight'] = G[
                 x][y]['weight'], G[u][v]['weight']
             swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
+            print('Maximum number of swap attempts (%s) exceeded ' % n +
                  'before desired swaps achieved (%s).' % n_swap)
             break
         n += 1
     return G
     
 
-def rich_club_create(G, k, max_tries=100,connected=1):
+@accept_csr
+def rich_club_create(G, k, max_tries=100,connected=1, inplace=False):
     """
 
     保持连通性：断边重连后增加连通性判断，若不保持连通性则撤销该断边重连操作
+    inplace=True 时直接置乱 G, 否则置乱 G 的结构副本
     """
     """
     节点的强度 = 节点所有连边的权重值之和
@@ -198,17 +225,21 @@ def rich_club_create(G, k, max_tries=100,connected=1):
     达到最大尝试次数或全部富节点间都有连边，循环结束
     强度大于k的节点为富节点
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
         if not nx.is_connected(G):
             raise nx.NetworkXError("Graph not connected")
     if len(G) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G)
+    if not inplace:
+        G = clone_graph(G)
     edges = G.edges()
     nodes = G.nodes()
     rnodes = [e for e in nodes if G.degree(e, weight='weight') >= k]  # 全部富节点
-    len_redges = len([e for e in edges if e[0] in rnodes and e[
-                     1] in rnodes])  # 网络中已有的富节点和富节点的连边数
+    rnode_set = set(rnodes)
+    len_redges = len([e for e in edges if e[0] in rnode_set and e[
+                     1] in rnode_set])  # 网络中已有的富节点和富节点的连边数
     len_possible_edges = len(rnodes) * (len(rnodes) - 1) / 2  # 全部富节点间都有连边的边数
     n_try = 0
     while len_redges < len_possible_edges:
@@ -229,7 +260,7 @@ def rich_club_create(G, k, max_tries=100,connected=1):
                 G.remove_edges_from([(u, v), (x, y)])
 
                 if connected == 1:
-                    if not nx.is_connected(G):
+                    if not swap_connected(G, [(u, v), (x, y)]):
                         G.add_edges_from([(u, v), (x, y)])
                         G[u][v]['weight'] = G[u][x]['weight']
                         G[x][y]['weight'] = G[v][y]['weight']
@@ -243,9 +274,11 @@ def rich_club_create(G, k, max_tries=100,connected=1):
     return G
 
 
-def rich_club_break(G, k, max_tries=100,connected=1):
+@accept_csr
+def rich_club_break(G, k, max_tries=100,connected=1, inplace=False):
     """
     保持连通性：断边重连后增加连通性判断，若不保持连通性则撤销该断边重连操作
+    inplace=True 时直接置乱 G, 否则置乱 G 的结构副本
     """
     """
     富边：富节点和富节点的连边
@@ -253,45 +286,45 @@ def rich_club_break(G, k, max_tries=100,connected=1):
     任选两条边(一条富边，一条非富边)，若富节点和非富节点间无连边，则断边重连
     达到最大尝试次数或无富边或无非富边，循环结束
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
         if not nx.is_connected(G):
             raise nx.NetworkXError("Graph not connected")
     if len(G) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G)
-    edges = G.edges()
+    if not inplace:
+        G = clone_graph(G)
+    edges = EdgeStore(G.edges())
     nodes = G.nodes()
-    rnodes = [e for e in nodes if G.degree(e, weight='weight') >= k]  # 全部富节点
-    redges = [e for e in edges if e[0] in rnodes and e[
-        1] in rnodes]  # 网络中已有的富节点和富节点的连边
-    pedges = [e for e in edges if e[0] not in rnodes and e[
-        1] not in rnodes]  # 网络中已有的非富节点和非富节点的连边
-#    len_redges = len(redges)
-#    len_pedges = len(pedges)
+    rnodes = set(e for e in nodes if G.degree(e, weight='weight') >= k)  # 全部富节点
+    redges = EdgeStore(e for e in edges if e[0] in rnodes and e[
+        1] in rnodes)  # 网络中已有的富节点和富节点的连边
+    pedges = EdgeStore(e for e in edges if e[0] not in rnodes and e[
+        1] not in rnodes)  # 网络中已有的非富节点和非富节点的连边
     n_try = 0
-    while redges and pedges:
-        u, v = random.choice(redges)  # 随机选一条富边
-        x, y = random.choice(pedges)  # 随机选一条非富边
-        if (x, u) not in edges and (u, x) not in edges and (v, y) not in edges and (y, v) not in edges:
+    while len(redges) and len(pedges):
+        u, v = redges.choice()  # 随机选一条富边
+        x, y = pedges.choice()  # 随机选一条非富边
+        if (x, u) not in edges and (v, y) not in edges:
             G.add_edges_from([(u, x), (v, y)])
             G[u][x]['weight'] = G[u][v]['weight']
             G[v][y]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(u, x), (v, y)])
-            edges.remove((u, v))
-            edges.remove((x, y))
-            redges.remove((u, v))
-            pedges.remove((x, y))
+            edges.replace((u, v), (u, x))
+            edges.replace((x, y), (v, y))
+            redges.remove(u, v)
+            pedges.remove(x, y)
             if connected ==1:
-                if not nx.is_connected(G):
+                if not swap_connected(G, [(u, v), (x, y)]):
                     G.add_edges_from([(u, v), (x, y)])
                     G[u][v]['weight'] = G[u][x]['weight']
                     G[x][y]['weight'] = G[v][y]['weight']
                     G.remove_edges_from([(u, x), (v, y)])
-                    edges.remove((u, x))
-                    edges.remove((v, y))
-                    edges.extend([(u, v), (x, y)])
-                    redges.extend([(u, v), (x, y)])
+                    edges.replace((u, x), (u, v))
+                    edges.replace((v, y), (x, y))
+                    redges.add(u, v)
+                    pedges.add(x, y)
         if n_try >= max_tries:
             print('Maximum number of attempts (%s) exceeded ' % n_try)
             break
@@ -300,171 +333,244 @@ def rich_club_break(G, k, max_tries=100,connected=1):
 
 
 # 匹配特性
-def assort_mixing(G0, n_swap=1, max_tries=100):
+def _move_strength(strength, old, new, w):
+    # 权重为 w 的连边由 old 移到 new
+    for node in old:
+        strength[node] -= w
+    for node in new:
+        strength[node] += w
+
+
+@accept_csr
+def assort_mixing(G0, n_swap=1, max_tries=100, inplace=False,
+                  target_r=None):
     """
     让强度大的节点和强度大的节点相连
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
+    给定 target_r 时, 度同配系数达到 target_r 即停止, 不看 n_swap
     """
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
 #    nodes = G.nodes()
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)  # 任选两条边
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    # 节点强度, 断边重连时随权重增量更新
+    strength = dict(G.degree(weight='weight'))
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() >= target_r:
+            break
+        (u, v), (x, y) = edges.sample_pair()  # 任选两条边
         if len(set([u, v, x, y])) < 4:
             continue
-        a, b, c, d = zip(
-            *sorted(G.degree([u, v, x, y], weight='weight').items(), key=lambda d: d[1], reverse=True))[0]
-        if (a, b) not in edges and (b, a)not in edges and (c, d) not in edges and (d, c)not in edges:
+        a, b, c, d = sorted([u, v, x, y], key=strength.get, reverse=True)
+        if (a, b) not in edges and (c, d) not in edges:
             G.add_edges_from([(a, b), (c, d)])
             G[a][b]['weight'] = G[u][v]['weight']
             G[c][d]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(a, b), (c, d)])
-            edges.remove((u, v))
-            edges.remove((x, y))
+            edges.replace((u, v), (a, b))
+            edges.replace((x, y), (c, d))
+            _move_strength(strength, (u, v), (a, b), G[a][b]['weight'])
+            _move_strength(strength, (x, y), (c, d), G[c][d]['weight'])
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, b), (c, d)]))
             swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
             break
         n += 1
     return G
 
 
-def assort_mixingc(G0, n_swap=1, max_tries=100,connected=1):
+@accept_csr
+def assort_mixingc(G0, n_swap=1, max_tries=100,connected=1, inplace=False,
+                   target_r=None):
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
-        if not nx.is_connected(G):
+        if not nx.is_connected(G0):
             raise nx.NetworkXError("Graph not connected")
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
 #    nodes = G.nodes()
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)  # 任选两条边
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    # 节点强度, 断边重连时随权重增量更新
+    strength = dict(G.degree(weight='weight'))
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() >= target_r:
+            break
+        (u, v), (x, y) = edges.sample_pair()  # 任选两条边
         if len(set([u, v, x, y])) < 4:
             continue
-        a, b, c, d = zip(
-            *sorted(G.degree([u, v, x, y], weight='weight').items(), key=lambda d: d[1], reverse=True))[0]
-        if (a, b) not in edges and (b, a)not in edges and (c, d) not in edges and (d, c)not in edges:
+        a, b, c, d = sorted([u, v, x, y], key=strength.get, reverse=True)
+        if (a, b) not in edges and (c, d) not in edges:
             G.add_edges_from([(a, b), (c, d)])
             G[a][b]['weight'] = G[u][v]['weight']
             G[c][d]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(a, b), (c, d)])
-            edges.remove((u, v))
-            edges.remove((x, y))
-            swapcount += 1
-            if not nx.is_connected(G):
+            edges.replace((u, v), (a, b))
+            edges.replace((x, y), (c, d))
+            if not swap_connected(G, [(u, v), (x, y)]):
                 G.add_edges_from([(u, v), (x, y)])
                 G[u][v]['weight'] = G[a][b]['weight']
                 G[x][y]['weight'] = G[c][d]['weight']
                 G.remove_edges_from([(a, b), (c, d)])
-                edges.remove((a, b))
-                edges.remove((c, d))
-                edges.extend([(u, v), (x, y)])
+                edges.replace((a, b), (u, v))
+                edges.replace((c, d), (x, y))
                 continue
+            _move_strength(strength, (u, v), (a, b), G[a][b]['weight'])
+            _move_strength(strength, (x, y), (c, d), G[c][d]['weight'])
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, b), (c, d)]))
+            swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
             break
         n += 1
     return G
 
 
-def disassort_mixing(G0, n_swap=1, max_tries=100):  # 异配
+@accept_csr
+def disassort_mixing(G0, n_swap=1, max_tries=100, inplace=False,
+                     target_r=None):  # 异配
     """
     让强度大的节点和强度小的节点相连
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
+    给定 target_r 时, 度同配系数达到 target_r 即停止, 不看 n_swap
     """
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
 #    nodes = G.nodes()
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)  # 任选两条边
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    # 节点强度, 断边重连时随权重增量更新
+    strength = dict(G.degree(weight='weight'))
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() <= target_r:
+            break
+        (u, v), (x, y) = edges.sample_pair()  # 任选两条边
         if len(set([u, v, x, y])) < 4:
             continue
-        a, b, c, d = zip(
-            *sorted(G.degree([u, v, x, y], weight='weight').items(), key=lambda d: d[1], reverse=True))[0]
-        if (a, d) not in edges and (d, a) not in edges and (c, b) not in edges and (b, c)not in edges:
+        a, b, c, d = sorted([u, v, x, y], key=strength.get, reverse=True)
+        if (a, d) not in edges and (b, c) not in edges:
             G.add_edges_from([(a, d), (b, c)])
             G[a][d]['weight'] = G[u][v]['weight']
             G[b][c]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(a, d), (b, c)])
-            edges.remove((u, v))
-            edges.remove((x, y))
+            edges.replace((u, v), (a, d))
+            edges.replace((x, y), (b, c))
+            _move_strength(strength, (u, v), (a, d), G[a][d]['weight'])
+            _move_strength(strength, (x, y), (b, c), G[b][c]['weight'])
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, d), (b, c)]))
             swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
             break
         n += 1
     return G
 
 
-def disassort_mixingc(G0, n_swap=1, max_tries=100,connected=1):
+@accept_csr
+def disassort_mixingc(G0, n_swap=1, max_tries=100,connected=1, inplace=False,
+                      target_r=None):
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
-        if not nx.is_connected(G):
+        if not nx.is_connected(G0):
             raise nx.NetworkXError("Graph not connected")
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
 #    nodes = G.nodes()
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)  # 任选两条边
+    edges = EdgeStore(G.edges())
+    assortativity = AssortativityTracker(G)
+    # 节点强度, 断边重连时随权重增量更新
+    strength = dict(G.degree(weight='weight'))
+    while swapcount < n_swap or target_r is not None:
+        if target_r is not None and assortativity.r() <= target_r:
+            break
+        (u, v), (x, y) = edges.sample_pair()  # 任选两条边
         if len(set([u, v, x, y])) < 4:
             continue
-        a, b, c, d = zip(
-            *sorted(G.degree([u, v, x, y], weight='weight').items(), key=lambda d: d[1], reverse=True))[0]
-        if (a, d) not in edges and (d, a)not in edges and (b, c) not in edges and (c, b)not in edges:
+        a, b, c, d = sorted([u, v, x, y], key=strength.get, reverse=True)
+        if (a, d) not in edges and (b, c) not in edges:
             G.add_edges_from([(a, d), (b, c)])
             G[a][d]['weight'] = G[u][v]['weight']
             G[b][c]['weight'] = G[x][y]['weight']
             G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(a, d), (b, c)])
-            edges.remove((u, v))
-            edges.remove((x, y))
-            swapcount += 1
-            if not nx.is_connected(G):
+            edges.replace((u, v), (a, d))
+            edges.replace((x, y), (b, c))
+            if not swap_connected(G, [(u, v), (x, y)]):
                 G.add_edges_from([(u, v), (x, y)])
                 G[u][v]['weight'] = G[a][d]['weight']
                 G[x][y]['weight'] = G[b][c]['weight']
                 G.remove_edges_from([(a, d), (b, c)])
-                edges.remove((a, d))
-                edges.remove((b, c))
-                edges.extend([(u, v), (x, y)])
+                edges.replace((a, d), (u, v))
+                edges.replace((b, c), (x, y))
                 continue
+            _move_strength(strength, (u, v), (a, d), G[a][d]['weight'])
+            _move_strength(strength, (x, y), (b, c), G[b][c]['weight'])
+            assortativity.commit(assortativity.delta([(u, v), (x, y)],
+                                                     [(a, d), (b, c)]))
+            swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
+            if target_r is None:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before desired swaps achieved (%s).' % n_swap)
+            else:
+                print('Maximum number of swap attempts (%s) exceeded ' % n +
+                      'before r reached %s (r = %.4f).' %
+                      (target_r, assortativity.r()))
             break
         n += 1
     return G
 
 
-def random_1kd(G0, n_swap=1, max_tries=100):
+@accept_csr(native=lambda a: True)
+def random_1kd(G0, n_swap=1, max_tries=100, inplace=False):
     """
     随机取两条边 u->v 和 x->y, 若u->y,x->v不存在, 断边重连
+    新边沿用原边的权重, 见 directed_swap
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
     """
     if not G0.is_directed():
         raise nx.NetworkXError("Graph not directed")
@@ -472,79 +578,35 @@ def random_1kd(G0, n_swap=1, max_tries=100):
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
-    n = 0
-    swapcount = 0
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)
-        if len(set([u, v, x, y])) < 4:
-            continue
-        if (x, v) not in edges and (u, y) not in edges:
-            G.add_edges_from([(u, y), (x, v)])
-            G[u][y]['weight'] = G[u][v]['weight']
-            G[x][v]['weight'] = G[x][y]['weight']
-            G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(u, y), (x, v)])
-            edges.remove((u, v))
-            edges.remove((x, y))
-            swapcount += 1
-        if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
-            break
-        n += 1
-    return G
+    G = G0 if inplace else clone_graph(G0)
+    return directed_swap(G, n_swap, max_tries)
 
 
-def random_1kdc(G0, n_swap=1, max_tries=100,connected=1):  # 保持连通性
+@accept_csr(native=lambda a: not a['connected'])
+def random_1kdc(G0, n_swap=1, max_tries=100,connected=1, inplace=False):  # 保持连通性
     """
     随机取两条边 u->v 和 x->y, 若u->y,x->v不存在, 断边重连
+    新边沿用原边的权重, 见 directed_swap
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
     """
+    if connected not in (0, 1):
+        raise nx.NetworkXError("connected must be 0 or 1.")
     if connected == 1:
-        if not nx.is_connected(G):
+        if not nx.is_weakly_connected(G0):
             raise nx.NetworkXError("Graph not connected")
     if n_swap > max_tries:
         raise nx.NetworkXError("Number of swaps > number of tries allowed.")
     if len(G0) < 4:
         raise nx.NetworkXError("Graph has less than four nodes.")
-    G = copy.deepcopy(G0)
-    n = 0
-    swapcount = 0
-    edges = G.edges()
-    while swapcount < n_swap:
-        (u, v), (x, y) = random.sample(edges, 2)
-        if len(set([u, v, x, y])) < 4:
-            continue
-        if (x, v) not in edges and (u, y) not in edges:
-            G.add_edges_from([(u, y), (x, v)])
-            G[u][y]['weight'] = G[u][v]['weight']
-            G[x][v]['weight'] = G[x][y]['weight']
-            G.remove_edges_from([(u, v), (x, y)])
-            edges.extend([(u, y), (x, v)])
-            edges.remove((u, v))
-            edges.remove((x, y))
-            swapcount += 1
-            if not nx.is_weakly_connected(G):
-                G.add_edges_from([(u, v), (x, y)])
-                G[u][v]['weight'] = G[u][y]['weight']
-                G[x][y]['weight'] = G[x][v]['weight']
-                G.remove_edges_from([(u, y), (x, v)])
-                edges.extend([(u, v), (x, y)])
-                edges.remove((u, y))
-                edges.remove((x, v))
-                continue
-        if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
-                 'before desired swaps achieved (%s).' % n_swap)
-            break
-        n += 1
-    return G
+    G = G0 if inplace else clone_graph(G0)
+    return directed_swap(G, n_swap, max_tries, connected=connected)
 
 
-def random_out_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(出)
+@accept_csr
+def random_out_lw(G0, n_swap=1, max_tries=100, inplace=False):  # 局部权重置乱(出)
     """
     任取同一节点的两条权重不相同的边，互换权重
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
     """
     if not G0.is_directed():
         raise nx.NetworkXError("Graph not directed")
@@ -553,7 +615,7 @@ def random_out_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(出)
     if len(G0) < 3:
         raise nx.NetworkXError("Graph has less than three nodes.")
 
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     nodes = G.nodes()
@@ -568,16 +630,18 @@ def random_out_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(出)
                 u][x]['weight'], G[u][v]['weight']
             swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
+            print('Maximum number of swap attempts (%s) exceeded ' % n +
                  'before desired swaps achieved (%s).' % n_swap)
             break
         n += 1
     return G
 
 
-def random_in_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(入)
+@accept_csr
+def random_in_lw(G0, n_swap=1, max_tries=100, inplace=False):  # 局部权重置乱(入)
     """
     任取同一节点的两条权重不相同的边，互换权重
+    inplace=True 时直接置乱 G0, 否则置乱 G0 的结构副本
     """
     if not G0.is_directed():
         raise nx.NetworkXError("Graph not directed")
@@ -586,7 +650,7 @@ def random_in_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(入)
     if len(G0) < 3:
         raise nx.NetworkXError("Graph has less than three nodes.")
 
-    G = copy.deepcopy(G0)
+    G = G0 if inplace else clone_graph(G0)
     n = 0
     swapcount = 0
     nodes = G.nodes()
@@ -601,7 +665,7 @@ def random_in_lw(G0, n_swap=1, max_tries=100):  # 局部权重置乱(入)
                 v][x]['weight'], G[u][x]['weight']
             swapcount += 1
         if n >= max_tries:
-            print('Maximum number of swap attempts (%s) exceeded ' % n_try +
+            print('Maximum number of swap attempts (%s) exceeded ' % n +
                  'before desired swaps achieved (%s).' % n_swap)
             break
         n += 1